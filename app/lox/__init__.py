@@ -1,8 +1,22 @@
+from .arena import Arena, ArenaLocals
 from .ast_printer import AstPrinter
+from .closure_interpreter import ClosureInterpreter
 from .expr import Expr
-from .interpreter import Interpreter
+from .interpreter import DEFAULT_MAX_DEPTH, Interpreter
+from .lowering import Lowerer
+from .lox_list import LoxList
+from .lox_map import LoxMap
+from .natives import NativeError, NativeFunction, Natives
+from .optimizer import Optimizer
+from .output import DEFAULT_BUFFER_SIZE, BufferMode, Output
 from .parser import Parser, ParseError
+from .profiler import ProfilingInterpreter
+from .program_cache import Program, ProgramCache
 from .resolver import Resolver, ResolveError
 from .scanner import Scanner
+from .stdlib import standard_library
 from .stmt import Stmt
+from .timings import PhaseTiming, Timings, count_nodes
 from .token import Token, TokenType
+from .token_buffer import TokenBuffer
+from .vm import VM
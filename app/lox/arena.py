@@ -0,0 +1,468 @@
+import enum
+from array import array
+from collections.abc import Iterator, MutableMapping, Sequence
+from typing import Any
+
+from .expr import *
+from .inline_cache import InlineCache
+from .stmt import *
+from .token import Token
+from .token_buffer import TOKEN_TYPES
+
+
+NodeKind = enum.Enum(
+    "NodeKind",
+    [
+        "ASSIGN",
+        "BINARY",
+        "BLOCK",
+        "CALL",
+        "CLASS",
+        "EXPRESSION",
+        "FUNCTION",
+        "GET",
+        "GROUPING",
+        "IF",
+        "INDEX",
+        "INDEX_SET",
+        "LIST",
+        "LITERAL",
+        "LOGICAL",
+        "PRINT",
+        "RETURN",
+        "SET",
+        "SUPER",
+        "THIS",
+        "TOKEN",
+        "UNARY",
+        "VAR",
+        "VARIABLE",
+        "WHILE",
+    ],
+)
+
+NONE = -1
+
+UNRESOLVED = -2
+
+
+class Arena:
+    def __init__(self) -> None:
+        self.kinds = array("B")
+        self.token_types = array("B")
+        self.lines = array("I")
+        self.names = array("i")
+        self.a = array("i")
+        self.b = array("i")
+        self.c = array("i")
+        self.children = array("i")
+        self.roots = array("i")
+        self.constants: list[Any] = []
+        self.caches: dict[int, InlineCache] = {}
+        self._constant_indices: dict[tuple[type, Any], int] = {}
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def add_root(self, stmt: Stmt) -> int:
+        index = self._add(stmt)
+        self.roots.append(index)
+        return index
+
+    def statements(self) -> "ArenaList":
+        return ArenaList(self, self.roots)
+
+    def node(self, index: int) -> Any:
+        if index == NONE:
+            return None
+        kind = self.kinds[index]
+        if kind == NodeKind.TOKEN.value:
+            return self.token(index)
+        return NODE_CLASSES[kind](self, index)
+
+    def token(self, index: int) -> Token:
+        return Token(TOKEN_TYPES[self.token_types[index]], self.constants[self.names[index]], None, self.lines[index])
+
+    def nodes(self, offset: int) -> "ArenaList":
+        start = offset + 1
+        return ArenaList(self, self.children[start:start + self.children[offset]])
+
+    def cache(self, index: int) -> InlineCache:
+        cache = self.caches.get(index)
+        if cache is None:
+            cache = self.caches[index] = InlineCache()
+        return cache
+
+    def add_constant(self, value: Any) -> int:
+        key = (type(value), value.hex() if isinstance(value, float) else value)
+        index = self._constant_indices.get(key)
+        if index is None:
+            index = self._constant_indices[key] = len(self.constants)
+            self.constants.append(value)
+        return index
+
+    def _append(
+        self, kind: NodeKind, token: Token | None = None, a: int = NONE, b: int = NONE, c: int = NONE
+    ) -> int:
+        index = len(self.kinds)
+        self.kinds.append(kind.value)
+        if token is None:
+            self.token_types.append(0)
+            self.lines.append(0)
+            self.names.append(NONE)
+        else:
+            self.token_types.append(token.token_type.value)
+            self.lines.append(token.line)
+            self.names.append(self.add_constant(token.lexeme))
+        self.a.append(a)
+        self.b.append(b)
+        self.c.append(c)
+        return index
+
+    def _add_list(self, nodes: list[Expr] | list[Stmt] | list[Token]) -> int:
+        indices = [self._add(node) for node in nodes]
+        offset = len(self.children)
+        self.children.append(len(indices))
+        self.children.extend(indices)
+        return offset
+
+    def _add_optional(self, node: Expr | Stmt | None) -> int:
+        return NONE if node is None else self._add(node)
+
+    def _add(self, node: Expr | Stmt | Token) -> int:
+        if isinstance(node, Token):
+            return self._append(NodeKind.TOKEN, node)
+
+        if isinstance(node, AssignExpr):
+            return self._append(NodeKind.ASSIGN, node.name, self._add(node.value))
+        if isinstance(node, BinaryExpr):
+            return self._append(NodeKind.BINARY, node.operator, self._add(node.left), self._add(node.right))
+        if isinstance(node, CallExpr):
+            return self._append(NodeKind.CALL, node.paren, self._add(node.callee), self._add_list(node.arguments))
+        if isinstance(node, GetExpr):
+            return self._append(NodeKind.GET, node.name, self._add(node.obj))
+        if isinstance(node, GroupingExpr):
+            return self._append(NodeKind.GROUPING, a=self._add(node.expression))
+        if isinstance(node, IndexExpr):
+            return self._append(NodeKind.INDEX, node.bracket, self._add(node.obj), self._add(node.index))
+        if isinstance(node, IndexSetExpr):
+            obj, index = self._add(node.obj), self._add(node.index)
+            return self._append(NodeKind.INDEX_SET, node.bracket, obj, index, self._add(node.value))
+        if isinstance(node, ListExpr):
+            return self._append(NodeKind.LIST, node.bracket, self._add_list(node.elements))
+        if isinstance(node, LiteralExpr):
+            return self._append(NodeKind.LITERAL, a=self.add_constant(node.value))
+        if isinstance(node, LogicalExpr):
+            return self._append(NodeKind.LOGICAL, node.operator, self._add(node.left), self._add(node.right))
+        if isinstance(node, SetExpr):
+            return self._append(NodeKind.SET, node.name, self._add(node.obj), self._add(node.value))
+        if isinstance(node, SuperExpr):
+            return self._append(NodeKind.SUPER, node.keyword, c=self._add(node.method))
+        if isinstance(node, ThisExpr):
+            return self._append(NodeKind.THIS, node.keyword)
+        if isinstance(node, UnaryExpr):
+            return self._append(NodeKind.UNARY, node.operator, self._add(node.right))
+        if isinstance(node, VariableExpr):
+            return self._append(NodeKind.VARIABLE, node.name)
+
+        if isinstance(node, BlockStmt):
+            return self._append(NodeKind.BLOCK, a=self._add_list(node.statements))
+        if isinstance(node, ClassStmt):
+            superclass = self._add_optional(node.superclass)
+            return self._append(NodeKind.CLASS, node.name, superclass, self._add_list(node.methods))
+        if isinstance(node, ExpressionStmt):
+            return self._append(NodeKind.EXPRESSION, a=self._add(node.expression))
+        if isinstance(node, FunctionStmt):
+            params = self._add_list(node.params)
+            return self._append(NodeKind.FUNCTION, node.name, params, self._add_list(node.body))
+        if isinstance(node, IfStmt):
+            condition, then_branch = self._add(node.condition), self._add(node.then_branch)
+            return self._append(NodeKind.IF, a=condition, b=then_branch, c=self._add_optional(node.else_branch))
+        if isinstance(node, PrintStmt):
+            return self._append(NodeKind.PRINT, a=self._add(node.expression))
+        if isinstance(node, ReturnStmt):
+            return self._append(NodeKind.RETURN, node.keyword, self._add_optional(node.value))
+        if isinstance(node, VarStmt):
+            return self._append(NodeKind.VAR, node.name, self._add_optional(node.initializer))
+        if isinstance(node, WhileStmt):
+            return self._append(NodeKind.WHILE, a=self._add(node.condition), b=self._add(node.body))
+
+        raise TypeError(f"Unknown node: {node!r}")
+
+
+class ArenaList(Sequence[Any]):
+    def __init__(self, arena: Arena, indices: Sequence[int]) -> None:
+        self._arena = arena
+        self._indices = indices
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return ArenaList(self._arena, self._indices[index])
+        return self._arena.node(self._indices[index])
+
+    def __iter__(self) -> Iterator[Any]:
+        node = self._arena.node
+        for index in self._indices:
+            yield node(index)
+
+
+class ArenaLocals(MutableMapping[Expr, tuple[int, int]]):
+    def __init__(self, arena: Arena) -> None:
+        self._arena = arena
+        self._depths = array("i", [UNRESOLVED]) * len(arena)
+        self._slots = array("i", [0]) * len(arena)
+        self._detached: dict[Expr, tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._depths) - self._depths.count(UNRESOLVED) + len(self._detached)
+
+    def __iter__(self) -> Iterator[Expr]:
+        for index, depth in enumerate(self._depths):
+            if depth != UNRESOLVED:
+                yield self._arena.node(index)
+        yield from self._detached
+
+    def __getitem__(self, expr: Expr) -> tuple[int, int]:
+        location = self.get(expr)
+        if location is None:
+            raise KeyError(expr)
+        return location
+
+    def __setitem__(self, expr: Expr, location: tuple[int, int]) -> None:
+        if isinstance(expr, ArenaNode):
+            self._depths[expr._index], self._slots[expr._index] = location
+        else:
+            self._detached[expr] = location
+
+    def __delitem__(self, expr: Expr) -> None:
+        if isinstance(expr, ArenaNode):
+            self[expr]
+            self._depths[expr._index] = UNRESOLVED
+        else:
+            del self._detached[expr]
+
+    def get(self, expr: Expr, default: Any = None) -> Any:
+        index = getattr(expr, "_index", NONE)
+        if index == NONE:
+            return self._detached.get(expr, default)
+        depth = self._depths[index]
+        if depth == UNRESOLVED:
+            return default
+        return depth, self._slots[index]
+
+
+class ArenaNode:
+    __slots__ = ("_arena", "_index")
+
+    def __init__(self, arena: Arena, index: int) -> None:
+        object.__setattr__(self, "_arena", arena)
+        object.__setattr__(self, "_index", index)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ArenaNode):
+            return NotImplemented
+        return self._arena is other._arena and self._index == other._index
+
+    def __hash__(self) -> int:
+        return hash((id(self._arena), self._index))
+
+
+class Child:
+    def __init__(self, column: str) -> None:
+        self._column = column
+
+    def __get__(self, node: ArenaNode | None, owner: type | None = None) -> Any:
+        if node is None:
+            return self
+        arena = node._arena
+        return arena.node(getattr(arena, self._column)[node._index])
+
+
+class Children:
+    def __init__(self, column: str) -> None:
+        self._column = column
+
+    def __get__(self, node: ArenaNode | None, owner: type | None = None) -> Any:
+        if node is None:
+            return self
+        arena = node._arena
+        return arena.nodes(getattr(arena, self._column)[node._index])
+
+
+class NodeToken:
+    def __get__(self, node: ArenaNode | None, owner: type | None = None) -> Any:
+        if node is None:
+            return self
+        return node._arena.token(node._index)
+
+
+class Constant:
+    def __get__(self, node: ArenaNode | None, owner: type | None = None) -> Any:
+        if node is None:
+            return self
+        arena = node._arena
+        return arena.constants[arena.a[node._index]]
+
+
+class Cache:
+    def __get__(self, node: ArenaNode | None, owner: type | None = None) -> Any:
+        if node is None:
+            return self
+        return node._arena.cache(node._index)
+
+
+class ArenaAssignExpr(ArenaNode, AssignExpr):
+    name = NodeToken()
+    value = Child("a")
+
+
+class ArenaBinaryExpr(ArenaNode, BinaryExpr):
+    left = Child("a")
+    operator = NodeToken()
+    right = Child("b")
+
+
+class ArenaCallExpr(ArenaNode, CallExpr):
+    callee = Child("a")
+    paren = NodeToken()
+    arguments = Children("b")
+
+
+class ArenaGetExpr(ArenaNode, GetExpr):
+    obj = Child("a")
+    name = NodeToken()
+    cache = Cache()
+
+
+class ArenaGroupingExpr(ArenaNode, GroupingExpr):
+    expression = Child("a")
+
+
+class ArenaIndexExpr(ArenaNode, IndexExpr):
+    obj = Child("a")
+    bracket = NodeToken()
+    index = Child("b")
+
+
+class ArenaIndexSetExpr(ArenaNode, IndexSetExpr):
+    obj = Child("a")
+    bracket = NodeToken()
+    index = Child("b")
+    value = Child("c")
+
+
+class ArenaListExpr(ArenaNode, ListExpr):
+    bracket = NodeToken()
+    elements = Children("a")
+
+
+class ArenaLiteralExpr(ArenaNode, LiteralExpr):
+    value = Constant()
+
+
+class ArenaLogicalExpr(ArenaNode, LogicalExpr):
+    left = Child("a")
+    operator = NodeToken()
+    right = Child("b")
+
+
+class ArenaSetExpr(ArenaNode, SetExpr):
+    obj = Child("a")
+    name = NodeToken()
+    value = Child("b")
+    cache = Cache()
+
+
+class ArenaSuperExpr(ArenaNode, SuperExpr):
+    keyword = NodeToken()
+    method = Child("c")
+    cache = Cache()
+
+
+class ArenaThisExpr(ArenaNode, ThisExpr):
+    keyword = NodeToken()
+
+
+class ArenaUnaryExpr(ArenaNode, UnaryExpr):
+    operator = NodeToken()
+    right = Child("a")
+
+
+class ArenaVariableExpr(ArenaNode, VariableExpr):
+    name = NodeToken()
+
+
+class ArenaBlockStmt(ArenaNode, BlockStmt):
+    statements = Children("a")
+
+
+class ArenaClassStmt(ArenaNode, ClassStmt):
+    name = NodeToken()
+    superclass = Child("a")
+    methods = Children("b")
+
+
+class ArenaExpressionStmt(ArenaNode, ExpressionStmt):
+    expression = Child("a")
+
+
+class ArenaFunctionStmt(ArenaNode, FunctionStmt):
+    name = NodeToken()
+    params = Children("a")
+    body = Children("b")
+
+
+class ArenaIfStmt(ArenaNode, IfStmt):
+    condition = Child("a")
+    then_branch = Child("b")
+    else_branch = Child("c")
+
+
+class ArenaPrintStmt(ArenaNode, PrintStmt):
+    expression = Child("a")
+
+
+class ArenaReturnStmt(ArenaNode, ReturnStmt):
+    keyword = NodeToken()
+    value = Child("a")
+
+
+class ArenaVarStmt(ArenaNode, VarStmt):
+    name = NodeToken()
+    initializer = Child("a")
+
+
+class ArenaWhileStmt(ArenaNode, WhileStmt):
+    condition = Child("a")
+    body = Child("b")
+
+
+NODE_CLASSES: dict[int, type[ArenaNode]] = {
+    NodeKind.ASSIGN.value: ArenaAssignExpr,
+    NodeKind.BINARY.value: ArenaBinaryExpr,
+    NodeKind.BLOCK.value: ArenaBlockStmt,
+    NodeKind.CALL.value: ArenaCallExpr,
+    NodeKind.CLASS.value: ArenaClassStmt,
+    NodeKind.EXPRESSION.value: ArenaExpressionStmt,
+    NodeKind.FUNCTION.value: ArenaFunctionStmt,
+    NodeKind.GET.value: ArenaGetExpr,
+    NodeKind.GROUPING.value: ArenaGroupingExpr,
+    NodeKind.IF.value: ArenaIfStmt,
+    NodeKind.INDEX.value: ArenaIndexExpr,
+    NodeKind.INDEX_SET.value: ArenaIndexSetExpr,
+    NodeKind.LIST.value: ArenaListExpr,
+    NodeKind.LITERAL.value: ArenaLiteralExpr,
+    NodeKind.LOGICAL.value: ArenaLogicalExpr,
+    NodeKind.PRINT.value: ArenaPrintStmt,
+    NodeKind.RETURN.value: ArenaReturnStmt,
+    NodeKind.SET.value: ArenaSetExpr,
+    NodeKind.SUPER.value: ArenaSuperExpr,
+    NodeKind.THIS.value: ArenaThisExpr,
+    NodeKind.UNARY.value: ArenaUnaryExpr,
+    NodeKind.VAR.value: ArenaVarStmt,
+    NodeKind.VARIABLE.value: ArenaVariableExpr,
+    NodeKind.WHILE.value: ArenaWhileStmt,
+}
@@ -0,0 +1,87 @@
+import dataclasses
+import enum
+from typing import Any
+
+
+OpCode = enum.IntEnum(
+    "OpCode",
+    [
+        "ADD",
+        "BUILD_LIST",
+        "CALL",
+        "CHECK_FIELDS",
+        "CLASS",
+        "CLOSE_UPVALUE",
+        "CLOSURE",
+        "CONSTANT",
+        "DEFINE_GLOBAL",
+        "DIVIDE",
+        "EQUAL",
+        "FALSE",
+        "GET_GLOBAL",
+        "GET_INDEX",
+        "GET_LOCAL",
+        "GET_METHOD",
+        "GET_PROPERTY",
+        "GET_SUPER",
+        "GET_SUPER_METHOD",
+        "GET_UPVALUE",
+        "GREATER",
+        "GREATER_EQUAL",
+        "INCREMENT_LOCAL",
+        "INVOKE",
+        "JUMP",
+        "JUMP_IF_FALSE",
+        "LESS",
+        "LESS_EQUAL",
+        "MULTIPLY",
+        "NEGATE",
+        "NIL",
+        "NOT",
+        "NOT_EQUAL",
+        "POP",
+        "PRINT",
+        "RETURN",
+        "SET_GLOBAL",
+        "SET_INDEX",
+        "SET_LOCAL",
+        "SET_PROPERTY",
+        "SET_UPVALUE",
+        "SUBTRACT",
+        "TAIL_CALL",
+        "TAIL_INVOKE",
+        "TRUE",
+    ],
+    start=0,
+)
+
+
+@dataclasses.dataclass(eq=False)
+class Chunk:
+    code: list[int] = dataclasses.field(default_factory=list)
+    lines: list[int] = dataclasses.field(default_factory=list)
+    constants: list[Any] = dataclasses.field(default_factory=list)
+    _constant_indices: dict[tuple[type, Any], int] = dataclasses.field(default_factory=dict, repr=False)
+
+    def write(self, word: int, line: int) -> None:
+        self.code.append(word)
+        self.lines.append(line)
+
+    def add_constant(self, value: Any) -> int:
+        key = (type(value), value.hex() if isinstance(value, float) else value)
+        index = self._constant_indices.get(key)
+        if index is None:
+            index = self._constant_indices[key] = len(self.constants)
+            self.constants.append(value)
+        return index
+
+
+@dataclasses.dataclass(eq=False)
+class FunctionProto:
+    name: str | None
+    arity: int = 0
+    upvalue_count: int = 0
+    chunk: Chunk = dataclasses.field(default_factory=Chunk)
+
+    def __str__(self) -> str:
+        return "<script>" if self.name is None else f"<fn {self.name}>"
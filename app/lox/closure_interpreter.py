@@ -0,0 +1,766 @@
+from __future__ import annotations
+from collections.abc import Callable
+from typing import Any
+
+from .environment import GLOBAL, UNDEFINED, Environment
+from .error import runtime_error
+from .expr import *
+from .interpreter import DEFAULT_MAX_DEPTH, Interpreter
+from .lox_class import LoxClass, LoxInstance
+from .lox_function import LoxFunction
+from .lox_list import LoxList
+from .natives import Natives
+from .output import Output
+from .return_value import ReturnValue, TailCall
+from .rope import Rope, concat
+from .stmt import *
+from .token import Token, TokenType
+
+
+type ExprCode = Callable[[Environment], Any]
+type StmtCode = Callable[[Environment], ReturnValue | TailCall | None]
+
+
+class CompiledFunction(LoxFunction):
+    def __init__(
+        self, declaration: FunctionStmt, closure: Environment, is_initializer: bool, body: StmtCode
+    ) -> None:
+        super().__init__(declaration, closure, is_initializer)
+        self._body = body
+
+    def _execute_body(self, interpreter: Interpreter, environment: Environment) -> ReturnValue | None:
+        return self._body(environment)
+
+
+class ClosureInterpreter(Interpreter):
+    def __init__(
+        self, output: Output | None = None, max_depth: int = DEFAULT_MAX_DEPTH, natives: Natives | None = None
+    ) -> None:
+        super().__init__(output, max_depth, natives)
+        self._scope_depth = 0
+
+    def _execute_program(self, stmts: list[Stmt]) -> None:
+        code = self._compile_sequence(stmts)
+        code(self.globals)
+
+    def _compile_sequence(self, stmts: list[Stmt]) -> StmtCode:
+        if len(stmts) == 1:
+            return self._compile_stmt(stmts[0])
+
+        if not any(self._may_return(stmt) for stmt in stmts):
+            codes = [
+                self._compile_expr(stmt.expression) if isinstance(stmt, ExpressionStmt) else self._compile_stmt(stmt)
+                for stmt in stmts
+            ]
+
+            def sequence(env: Environment) -> None:
+                for code in codes:
+                    code(env)
+
+            return sequence
+
+        codes = [self._compile_stmt(stmt) for stmt in stmts]
+
+        def returning_sequence(env: Environment) -> ReturnValue | None:
+            for code in codes:
+                completion = code(env)
+                if completion is not None:
+                    return completion
+
+        return returning_sequence
+
+    def _compile_scope(self, stmts: list[Stmt]) -> StmtCode:
+        self._scope_depth += 1
+        try:
+            return self._compile_sequence(stmts)
+        finally:
+            self._scope_depth -= 1
+
+    def _may_return(self, stmt: Stmt) -> bool:
+        if isinstance(stmt, ReturnStmt):
+            return True
+        if isinstance(stmt, BlockStmt):
+            return any(self._may_return(statement) for statement in stmt.statements)
+        if isinstance(stmt, IfStmt):
+            return self._may_return(stmt.then_branch) or (
+                stmt.else_branch is not None and self._may_return(stmt.else_branch)
+            )
+        if isinstance(stmt, (ForStmt, WhileStmt)):
+            return self._may_return(stmt.body)
+        return False
+
+    def _compile_define(self, name: Token) -> Callable[[Environment, Any], None]:
+        if self._scope_depth == 0:
+            values = self.globals.values
+            slot = self.globals.slot(name.lexeme)
+
+            def define_global(env: Environment, value: Any) -> None:
+                values[slot] = value
+
+            return define_global
+        return lambda env, value: env.values.append(value)
+
+    def _compile_stmt(self, stmt: Stmt) -> StmtCode:
+        if isinstance(stmt, BlockStmt):
+            return self._compile_block_stmt(stmt)
+        if isinstance(stmt, ClassStmt):
+            return self._compile_class_stmt(stmt)
+        if isinstance(stmt, ExpressionStmt):
+            return self._compile_expression_stmt(stmt)
+        if isinstance(stmt, ForStmt):
+            return self._compile_for_stmt(stmt)
+        if isinstance(stmt, FunctionStmt):
+            return self._compile_function_stmt(stmt)
+        if isinstance(stmt, IfStmt):
+            return self._compile_if_stmt(stmt)
+        if isinstance(stmt, PrintStmt):
+            return self._compile_print_stmt(stmt)
+        if isinstance(stmt, ReturnStmt):
+            return self._compile_return_stmt(stmt)
+        if isinstance(stmt, VarStmt):
+            return self._compile_var_stmt(stmt)
+        if isinstance(stmt, WhileStmt):
+            return self._compile_while_stmt(stmt)
+
+    def _compile_block_stmt(self, stmt: BlockStmt) -> StmtCode:
+        body = self._compile_scope(stmt.statements)
+
+        def block(env: Environment) -> ReturnValue | None:
+            return body(Environment(env))
+
+        return block
+
+    def _compile_class_stmt(self, stmt: ClassStmt) -> StmtCode:
+        name = stmt.name
+        define = self._compile_define(name)
+        superclass_code = None if stmt.superclass is None else self._compile_expr(stmt.superclass)
+        methods = [
+            (method, method.name.lexeme == "init", self._compile_scope(method.body))
+            for method in stmt.methods
+        ]
+
+        def class_(env: Environment) -> None:
+            superclass = None
+            if superclass_code is not None:
+                superclass = superclass_code(env)
+                if not isinstance(superclass, LoxClass):
+                    runtime_error(stmt.superclass.name, "Superclass must be a class.")
+
+            closure = env
+            if superclass is not None:
+                closure = Environment(env, [superclass])
+
+            functions = {
+                method.name.lexeme: CompiledFunction(method, closure, is_initializer, body)
+                for method, is_initializer, body in methods
+            }
+            define(env, LoxClass(name.lexeme, superclass, functions))
+
+        return class_
+
+    def _compile_expression_stmt(self, stmt: ExpressionStmt) -> StmtCode:
+        expression = self._compile_expr(stmt.expression)
+
+        def expression_(env: Environment) -> None:
+            expression(env)
+
+        return expression_
+
+    def _compile_for_stmt(self, stmt: ForStmt) -> StmtCode:
+        condition = self._compile_expr(stmt.condition)
+        body = self._compile_scope([stmt.body])
+        increment = self._compile_expr(stmt.increment)
+
+        if not self._may_return(stmt.body):
+            def for_(env: Environment) -> None:
+                scope = Environment(env)
+                value = condition(env)
+                while value is not None and value is not False:
+                    body(scope)
+                    increment(scope)
+                    value = condition(env)
+
+            return for_
+
+        def returning_for(env: Environment) -> ReturnValue | None:
+            scope = Environment(env)
+            value = condition(env)
+            while value is not None and value is not False:
+                completion = body(scope)
+                if completion is not None:
+                    return completion
+                increment(scope)
+                value = condition(env)
+
+        return returning_for
+
+    def _compile_function_stmt(self, stmt: FunctionStmt) -> StmtCode:
+        define = self._compile_define(stmt.name)
+        body = self._compile_scope(stmt.body)
+
+        def function(env: Environment) -> None:
+            define(env, CompiledFunction(stmt, env, False, body))
+
+        return function
+
+    def _compile_if_stmt(self, stmt: IfStmt) -> StmtCode:
+        condition = self._compile_expr(stmt.condition)
+        then_branch = self._compile_stmt(stmt.then_branch)
+        if stmt.else_branch is None:
+            def if_(env: Environment) -> ReturnValue | None:
+                value = condition(env)
+                if value is not None and value is not False:
+                    return then_branch(env)
+
+            return if_
+
+        else_branch = self._compile_stmt(stmt.else_branch)
+
+        def if_else(env: Environment) -> ReturnValue | None:
+            value = condition(env)
+            if value is not None and value is not False:
+                return then_branch(env)
+            return else_branch(env)
+
+        return if_else
+
+    def _compile_print_stmt(self, stmt: PrintStmt) -> StmtCode:
+        expression = self._compile_expr(stmt.expression)
+        stringify = self._stringify
+        write_line = self.output.write_line
+
+        def print_(env: Environment) -> None:
+            write_line(stringify(expression(env)))
+
+        return print_
+
+    def _compile_return_stmt(self, stmt: ReturnStmt) -> StmtCode:
+        if stmt.value is None:
+            def return_nil(env: Environment) -> ReturnValue:
+                return ReturnValue(None)
+
+            return return_nil
+
+        if stmt.value in self.tail_calls:
+            return self._compile_tail_call(stmt.value)
+
+        value = self._compile_expr(stmt.value)
+
+        def return_(env: Environment) -> ReturnValue:
+            return ReturnValue(value(env))
+
+        return return_
+
+    def _compile_tail_call(self, expr: CallExpr) -> StmtCode:
+        arguments = [self._compile_expr(argument) for argument in expr.arguments]
+        paren = expr.paren
+        check_arity = self._check_arity
+
+        if isinstance(expr.callee, SuperExpr):
+            find_method = self._compile_super_lookup(expr.callee)
+
+            def super_tail_call(env: Environment) -> TailCall:
+                instance, method = find_method(env)
+                values = [argument(env) for argument in arguments]
+                check_arity(method, values, paren)
+                values.insert(0, instance)
+                return TailCall(method, values)
+
+            return super_tail_call
+
+        tail_call = self._tail_call
+
+        if isinstance(expr.callee, GetExpr):
+            callee = expr.callee
+            obj = self._compile_expr(callee.obj)
+            lexeme = callee.name.lexeme
+            cache = callee.cache
+            get_property = self._get_property
+
+            def invoke_tail_call(env: Environment) -> ReturnValue | TailCall:
+                instance = obj(env)
+                if isinstance(instance, LoxInstance):
+                    method = instance.find_member(lexeme, cache)
+                    if method is not None and type(method) is not int:
+                        values = [argument(env) for argument in arguments]
+                        check_arity(method, values, paren)
+                        values.insert(0, instance)
+                        return TailCall(method, values)
+
+                function = get_property(instance, callee)
+                return tail_call(function, [argument(env) for argument in arguments], paren)
+
+            return invoke_tail_call
+
+        function = self._compile_expr(expr.callee)
+
+        def call_tail_call(env: Environment) -> ReturnValue | TailCall:
+            return tail_call(function(env), [argument(env) for argument in arguments], paren)
+
+        return call_tail_call
+
+    def _compile_var_stmt(self, stmt: VarStmt) -> StmtCode:
+        initializer = None if stmt.initializer is None else self._compile_expr(stmt.initializer)
+
+        if self._scope_depth == 0:
+            values = self.globals.values
+            slot = self.globals.slot(stmt.name.lexeme)
+
+            def var_global(env: Environment) -> None:
+                values[slot] = None if initializer is None else initializer(env)
+
+            return var_global
+
+        if initializer is None:
+            def var_nil(env: Environment) -> None:
+                env.values.append(None)
+
+            return var_nil
+
+        def var(env: Environment) -> None:
+            env.values.append(initializer(env))
+
+        return var
+
+    def _compile_while_stmt(self, stmt: WhileStmt) -> StmtCode:
+        condition = self._compile_expr(stmt.condition)
+        body = self._compile_stmt(stmt.body)
+
+        if not self._may_return(stmt.body):
+            def while_(env: Environment) -> None:
+                value = condition(env)
+                while value is not None and value is not False:
+                    body(env)
+                    value = condition(env)
+
+            return while_
+
+        def returning_while(env: Environment) -> ReturnValue | None:
+            value = condition(env)
+            while value is not None and value is not False:
+                completion = body(env)
+                if completion is not None:
+                    return completion
+                value = condition(env)
+
+        return returning_while
+
+    def _compile_expr(self, expr: Expr) -> ExprCode:
+        if isinstance(expr, AssignExpr):
+            return self._compile_assign_expr(expr)
+        if isinstance(expr, BinaryExpr):
+            return self._compile_binary_expr(expr)
+        if isinstance(expr, CallExpr):
+            return self._compile_call_expr(expr)
+        if isinstance(expr, CompareConstantExpr):
+            return self._compile_compare_constant_expr(expr)
+        if isinstance(expr, GetExpr):
+            return self._compile_get_expr(expr)
+        if isinstance(expr, GroupingExpr):
+            return self._compile_expr(expr.expression)
+        if isinstance(expr, IncrementExpr):
+            return self._compile_increment_expr(expr)
+        if isinstance(expr, IndexExpr):
+            return self._compile_index_expr(expr)
+        if isinstance(expr, IndexSetExpr):
+            return self._compile_index_set_expr(expr)
+        if isinstance(expr, ListExpr):
+            return self._compile_list_expr(expr)
+        if isinstance(expr, LiteralExpr):
+            return self._compile_literal_expr(expr)
+        if isinstance(expr, LogicalExpr):
+            return self._compile_logical_expr(expr)
+        if isinstance(expr, SetExpr):
+            return self._compile_set_expr(expr)
+        if isinstance(expr, SuperExpr):
+            return self._compile_super_expr(expr)
+        if isinstance(expr, ThisExpr):
+            return self._compile_variable(expr.keyword, expr)
+        if isinstance(expr, UnaryExpr):
+            return self._compile_unary_expr(expr)
+        if isinstance(expr, VariableExpr):
+            return self._compile_variable(expr.name, expr)
+
+    def _compile_assign_expr(self, expr: AssignExpr) -> ExprCode:
+        value = self._compile_expr(expr.value)
+        name = expr.name
+        location = self._locals.get(expr)
+
+        if location is None:
+            assign = self.globals.assign
+
+            def assign_global(env: Environment) -> Any:
+                result = value(env)
+                assign(name, result)
+                return result
+
+            return assign_global
+
+        distance, slot = location
+        if distance == GLOBAL:
+            assign_at = self.globals.assign_at
+
+            def assign_bound_global(env: Environment) -> Any:
+                result = value(env)
+                assign_at(slot, name, result)
+                return result
+
+            return assign_bound_global
+
+        if distance == 0:
+            def assign_local(env: Environment) -> Any:
+                result = env.values[slot] = value(env)
+                return result
+
+            return assign_local
+
+        def assign_enclosing(env: Environment) -> Any:
+            result = value(env)
+            env.assign_at(distance, slot, result)
+            return result
+
+        return assign_enclosing
+
+    def _compile_binary_expr(self, expr: BinaryExpr) -> ExprCode:
+        left = self._compile_expr(expr.left)
+        right = self._compile_expr(expr.right)
+        operator = expr.operator
+        check = self._check_number_operands
+
+        match operator.token_type:
+            case TokenType.BANG_EQUAL:
+                return lambda env: left(env) != right(env)
+            case TokenType.EQUAL_EQUAL:
+                return lambda env: left(env) == right(env)
+            case TokenType.GREATER:
+                def greater(env: Environment) -> Any:
+                    a, b = left(env), right(env)
+                    check(operator, a, b)
+                    return a > b
+
+                return greater
+            case TokenType.GREATER_EQUAL:
+                def greater_equal(env: Environment) -> Any:
+                    a, b = left(env), right(env)
+                    check(operator, a, b)
+                    return a >= b
+
+                return greater_equal
+            case TokenType.LESS:
+                def less(env: Environment) -> Any:
+                    a, b = left(env), right(env)
+                    check(operator, a, b)
+                    return a < b
+
+                return less
+            case TokenType.LESS_EQUAL:
+                def less_equal(env: Environment) -> Any:
+                    a, b = left(env), right(env)
+                    check(operator, a, b)
+                    return a <= b
+
+                return less_equal
+            case TokenType.MINUS:
+                def minus(env: Environment) -> Any:
+                    a, b = left(env), right(env)
+                    check(operator, a, b)
+                    return a - b
+
+                return minus
+            case TokenType.PLUS:
+                def plus(env: Environment) -> Any:
+                    a, b = left(env), right(env)
+                    if isinstance(a, float) and isinstance(b, float):
+                        return a + b
+                    if isinstance(a, (str, Rope)) and isinstance(b, (str, Rope)):
+                        return concat(a, b)
+                    runtime_error(operator, "Operands must be two numbers or two strings.")
+
+                return plus
+            case TokenType.SLASH:
+                def slash(env: Environment) -> Any:
+                    a, b = left(env), right(env)
+                    check(operator, a, b)
+                    return a / b
+
+                return slash
+            case TokenType.STAR:
+                def star(env: Environment) -> Any:
+                    a, b = left(env), right(env)
+                    check(operator, a, b)
+                    return a * b
+
+                return star
+
+    def _compile_call_expr(self, expr: CallExpr) -> ExprCode:
+        if isinstance(expr.callee, GetExpr):
+            return self._compile_invoke(expr, expr.callee)
+        if isinstance(expr.callee, SuperExpr):
+            return self._compile_super_invoke(expr, expr.callee)
+
+        callee = self._compile_expr(expr.callee)
+        arguments = [self._compile_expr(argument) for argument in expr.arguments]
+        paren = expr.paren
+        call_value = self._call
+
+        def call(env: Environment) -> Any:
+            function = callee(env)
+            return call_value(function, [argument(env) for argument in arguments], paren)
+
+        return call
+
+    def _compile_invoke(self, expr: CallExpr, callee: GetExpr) -> ExprCode:
+        obj = self._compile_expr(callee.obj)
+        arguments = [self._compile_expr(argument) for argument in expr.arguments]
+        lexeme = callee.name.lexeme
+        cache = callee.cache
+        paren = expr.paren
+        call_value = self._call
+        check_call = self._check_call
+        get_property = self._get_property
+
+        def invoke(env: Environment) -> Any:
+            instance = obj(env)
+            if isinstance(instance, LoxInstance):
+                method = instance.find_member(lexeme, cache)
+                if method is not None and type(method) is not int:
+                    values = [argument(env) for argument in arguments]
+                    check_call(method, values, paren)
+                    return method.call_method(self, instance, values)
+
+            function = get_property(instance, callee)
+            return call_value(function, [argument(env) for argument in arguments], paren)
+
+        return invoke
+
+    def _compile_super_invoke(self, expr: CallExpr, callee: SuperExpr) -> ExprCode:
+        find_method = self._compile_super_lookup(callee)
+        arguments = [self._compile_expr(argument) for argument in expr.arguments]
+        paren = expr.paren
+        check_call = self._check_call
+
+        def super_invoke(env: Environment) -> Any:
+            instance, method = find_method(env)
+            values = [argument(env) for argument in arguments]
+            check_call(method, values, paren)
+            return method.call_method(self, instance, values)
+
+        return super_invoke
+
+    def _compile_compare_constant_expr(self, expr: CompareConstantExpr) -> ExprCode:
+        left = self._compile_variable(expr.name, expr)
+        right = expr.value
+        operator = expr.operator
+        check = self._check_number_operands
+
+        match operator.token_type:
+            case TokenType.BANG_EQUAL:
+                return lambda env: left(env) != right
+            case TokenType.EQUAL_EQUAL:
+                return lambda env: left(env) == right
+            case TokenType.GREATER:
+                def greater(env: Environment) -> Any:
+                    a = left(env)
+                    check(operator, a, right)
+                    return a > right
+
+                return greater
+            case TokenType.GREATER_EQUAL:
+                def greater_equal(env: Environment) -> Any:
+                    a = left(env)
+                    check(operator, a, right)
+                    return a >= right
+
+                return greater_equal
+            case TokenType.LESS:
+                def less(env: Environment) -> Any:
+                    a = left(env)
+                    check(operator, a, right)
+                    return a < right
+
+                return less
+            case TokenType.LESS_EQUAL:
+                def less_equal(env: Environment) -> Any:
+                    a = left(env)
+                    check(operator, a, right)
+                    return a <= right
+
+                return less_equal
+
+    def _compile_get_expr(self, expr: GetExpr) -> ExprCode:
+        obj = self._compile_expr(expr.obj)
+        name = expr.name
+        cache = expr.cache
+        get_builtin_property = self._get_builtin_property
+
+        def get(env: Environment) -> Any:
+            instance = obj(env)
+            if isinstance(instance, LoxInstance):
+                if cache.key is instance.shape and type(cache.value) is int:
+                    return instance.values[cache.value]
+                return instance.get(name, cache)
+            return get_builtin_property(instance, name)
+
+        return get
+
+    def _compile_increment_expr(self, expr: IncrementExpr) -> ExprCode:
+        operator, delta = expr.operator, expr.delta
+        check = self._check_increment_operand
+        distance, slot = self._locals[expr]
+        assert distance == 1
+
+        def increment(env: Environment) -> Any:
+            values = env.enclosing.values
+            value = values[slot]
+            check(operator, value)
+            value = values[slot] = value + delta
+            return value
+
+        return increment
+
+    def _compile_index_expr(self, expr: IndexExpr) -> ExprCode:
+        obj = self._compile_expr(expr.obj)
+        index = self._compile_expr(expr.index)
+        bracket = expr.bracket
+        get_index = self._get_index
+
+        def index_(env: Environment) -> Any:
+            target = obj(env)
+            return get_index(target, index(env), bracket)
+
+        return index_
+
+    def _compile_index_set_expr(self, expr: IndexSetExpr) -> ExprCode:
+        obj = self._compile_expr(expr.obj)
+        index = self._compile_expr(expr.index)
+        value = self._compile_expr(expr.value)
+        bracket = expr.bracket
+        set_index = self._set_index
+
+        def index_set(env: Environment) -> Any:
+            target = obj(env)
+            position = index(env)
+            result = value(env)
+            set_index(target, position, result, bracket)
+            return result
+
+        return index_set
+
+    def _compile_list_expr(self, expr: ListExpr) -> ExprCode:
+        elements = [self._compile_expr(element) for element in expr.elements]
+
+        def list_(env: Environment) -> Any:
+            return LoxList([element(env) for element in elements])
+
+        return list_
+
+    def _compile_literal_expr(self, expr: LiteralExpr) -> ExprCode:
+        value = expr.value
+        return lambda env: value
+
+    def _compile_logical_expr(self, expr: LogicalExpr) -> ExprCode:
+        left = self._compile_expr(expr.left)
+        right = self._compile_expr(expr.right)
+
+        if expr.operator.token_type == TokenType.OR:
+            def or_(env: Environment) -> Any:
+                value = left(env)
+                if value is not None and value is not False:
+                    return value
+                return right(env)
+
+            return or_
+
+        def and_(env: Environment) -> Any:
+            value = left(env)
+            if value is None or value is False:
+                return value
+            return right(env)
+
+        return and_
+
+    def _compile_set_expr(self, expr: SetExpr) -> ExprCode:
+        obj = self._compile_expr(expr.obj)
+        value = self._compile_expr(expr.value)
+        name = expr.name
+        cache = expr.cache
+
+        def set_(env: Environment) -> Any:
+            instance = obj(env)
+            if not isinstance(instance, LoxInstance):
+                runtime_error(name, "Only instances have fields.")
+            result = value(env)
+            if cache.key is instance.shape and cache.value[0] is cache.key:
+                instance.values[cache.value[1]] = result
+            else:
+                instance.set(name, result, cache)
+            return result
+
+        return set_
+
+    def _compile_super_expr(self, expr: SuperExpr) -> ExprCode:
+        find_method = self._compile_super_lookup(expr)
+
+        def super_(env: Environment) -> Any:
+            instance, method = find_method(env)
+            return method.bind(instance)
+
+        return super_
+
+    def _compile_super_lookup(self, expr: SuperExpr) -> Callable[[Environment], tuple[LoxInstance, LoxFunction]]:
+        distance, slot = self._locals[expr]
+        method_name = expr.method
+        cache = expr.cache
+
+        def find_method(env: Environment) -> tuple[LoxInstance, LoxFunction]:
+            environment = env.ancestor(distance - 1)
+            superclass = environment.enclosing.values[slot]
+            method = superclass.find_method(method_name.lexeme, cache)
+            if method is None:
+                runtime_error(method_name, "Undefined property '" + method_name.lexeme + "'.")
+            return environment.values[0], method
+
+        return find_method
+
+    def _compile_unary_expr(self, expr: UnaryExpr) -> ExprCode:
+        right = self._compile_expr(expr.right)
+        operator = expr.operator
+
+        if operator.token_type == TokenType.BANG:
+            def not_(env: Environment) -> Any:
+                value = right(env)
+                return value is None or value is False
+
+            return not_
+
+        check = self._check_number_operand
+
+        def negate(env: Environment) -> Any:
+            value = right(env)
+            check(operator, value)
+            return -value
+
+        return negate
+
+    def _compile_variable(self, name: Token, expr: Expr) -> ExprCode:
+        location = self._locals.get(expr)
+        if location is None:
+            get = self.globals.get
+            return lambda env: get(name)
+
+        distance, slot = location
+        if distance == GLOBAL:
+            values = self.globals.values
+
+            def global_variable(env: Environment) -> Any:
+                value = values[slot]
+                if value is UNDEFINED:
+                    runtime_error(name, f"Undefined variable '{name.lexeme}'.")
+                return value
+
+            return global_variable
+        if distance == 0:
+            return lambda env: env.values[slot]
+        if distance == 1:
+            return lambda env: env.enclosing.values[slot]
+        return lambda env: env.get_at(distance, slot)
@@ -0,0 +1,450 @@
+from __future__ import annotations
+import dataclasses
+from typing import Any
+
+from .bytecode import FunctionProto, OpCode
+from .environment import GlobalEnvironment
+from .expr import *
+from .resolver import FunctionType
+from .stmt import *
+from .token import Token, TokenType
+
+
+BINARY_OPCODES = {
+    TokenType.BANG_EQUAL: OpCode.NOT_EQUAL,
+    TokenType.EQUAL_EQUAL: OpCode.EQUAL,
+    TokenType.GREATER: OpCode.GREATER,
+    TokenType.GREATER_EQUAL: OpCode.GREATER_EQUAL,
+    TokenType.LESS: OpCode.LESS,
+    TokenType.LESS_EQUAL: OpCode.LESS_EQUAL,
+    TokenType.MINUS: OpCode.SUBTRACT,
+    TokenType.PLUS: OpCode.ADD,
+    TokenType.SLASH: OpCode.DIVIDE,
+    TokenType.STAR: OpCode.MULTIPLY,
+}
+
+
+@dataclasses.dataclass(eq=False)
+class Local:
+    name: str
+    depth: int
+    is_captured: bool = False
+
+
+@dataclasses.dataclass(eq=False)
+class FunctionState:
+    function: FunctionProto
+    function_type: FunctionType
+    enclosing: FunctionState | None
+    locals: list[Local]
+    upvalues: list[tuple[bool, int]] = dataclasses.field(default_factory=list)
+    scope_depth: int = 0
+
+
+TAIL_OPCODES = {
+    OpCode.CALL: OpCode.TAIL_CALL,
+    OpCode.INVOKE: OpCode.TAIL_INVOKE,
+}
+
+
+class Compiler:
+    def __init__(self, globals: GlobalEnvironment, tail_calls: set[Expr]) -> None:
+        self._globals = globals
+        self._tail_calls = tail_calls
+        self._state: FunctionState | None = None
+        self._line = 0
+
+    def compile(self, stmts: list[Stmt]) -> FunctionProto:
+        self._begin_function(None, FunctionType.NONE)
+        for stmt in stmts:
+            self._compile(stmt)
+        function, _ = self._end_function()
+        return function
+
+    def _compile(self, node: Expr | Stmt) -> None:
+        if isinstance(node, AssignExpr):
+            return self._compile_assign_expr(node)
+        if isinstance(node, BinaryExpr):
+            return self._compile_binary_expr(node)
+        if isinstance(node, CallExpr):
+            return self._compile_call_expr(node)
+        if isinstance(node, CompareConstantExpr):
+            return self._compile_compare_constant_expr(node)
+        if isinstance(node, GetExpr):
+            return self._compile_get_expr(node)
+        if isinstance(node, GroupingExpr):
+            return self._compile(node.expression)
+        if isinstance(node, IncrementExpr):
+            return self._compile_increment_expr(node)
+        if isinstance(node, IndexExpr):
+            return self._compile_index_expr(node)
+        if isinstance(node, IndexSetExpr):
+            return self._compile_index_set_expr(node)
+        if isinstance(node, ListExpr):
+            return self._compile_list_expr(node)
+        if isinstance(node, LiteralExpr):
+            return self._compile_literal_expr(node)
+        if isinstance(node, LogicalExpr):
+            return self._compile_logical_expr(node)
+        if isinstance(node, SetExpr):
+            return self._compile_set_expr(node)
+        if isinstance(node, SuperExpr):
+            return self._compile_super_expr(node)
+        if isinstance(node, ThisExpr):
+            return self._emit_get_variable(node.keyword)
+        if isinstance(node, UnaryExpr):
+            return self._compile_unary_expr(node)
+        if isinstance(node, VariableExpr):
+            return self._emit_get_variable(node.name)
+
+        if isinstance(node, BlockStmt):
+            return self._compile_block_stmt(node)
+        if isinstance(node, ClassStmt):
+            return self._compile_class_stmt(node)
+        if isinstance(node, ExpressionStmt):
+            return self._compile_expression_stmt(node)
+        if isinstance(node, ForStmt):
+            return self._compile_for_stmt(node)
+        if isinstance(node, FunctionStmt):
+            return self._compile_function_stmt(node)
+        if isinstance(node, IfStmt):
+            return self._compile_if_stmt(node)
+        if isinstance(node, PrintStmt):
+            return self._compile_print_stmt(node)
+        if isinstance(node, ReturnStmt):
+            return self._compile_return_stmt(node)
+        if isinstance(node, VarStmt):
+            return self._compile_var_stmt(node)
+        if isinstance(node, WhileStmt):
+            return self._compile_while_stmt(node)
+
+    def _compile_assign_expr(self, expr: AssignExpr) -> None:
+        self._compile(expr.value)
+        self._emit_set_variable(expr.name)
+
+    def _compile_binary_expr(self, expr: BinaryExpr) -> None:
+        self._compile(expr.left)
+        self._compile(expr.right)
+        self._line = expr.operator.line
+        self._emit(BINARY_OPCODES[expr.operator.token_type])
+
+    def _compile_call_expr(self, expr: CallExpr) -> None:
+        if isinstance(expr.callee, GetExpr):
+            self._compile_invoke(expr, expr.callee)
+            return
+        if isinstance(expr.callee, SuperExpr):
+            self._compile_super_invoke(expr, expr.callee)
+            return
+
+        self._compile(expr.callee)
+        for argument in expr.arguments:
+            self._compile(argument)
+        self._line = expr.paren.line
+        self._emit(OpCode.CALL, len(expr.arguments))
+
+    def _compile_invoke(self, expr: CallExpr, callee: GetExpr) -> None:
+        self._compile(callee.obj)
+        self._line = callee.name.line
+        self._emit(OpCode.GET_METHOD, self._constant(callee.name), self._constant(callee.cache))
+        for argument in expr.arguments:
+            self._compile(argument)
+        self._line = expr.paren.line
+        self._emit(OpCode.INVOKE, len(expr.arguments))
+
+    def _compile_super_invoke(self, expr: CallExpr, callee: SuperExpr) -> None:
+        self._emit_get_variable(Token(TokenType.THIS, "this", None, callee.keyword.line))
+        self._emit_get_variable(callee.keyword)
+        self._line = callee.method.line
+        self._emit(OpCode.GET_SUPER_METHOD, self._constant(callee.method), self._constant(callee.cache))
+        for argument in expr.arguments:
+            self._compile(argument)
+        self._line = expr.paren.line
+        self._emit(OpCode.INVOKE, len(expr.arguments))
+
+    def _compile_compare_constant_expr(self, expr: CompareConstantExpr) -> None:
+        self._emit_get_variable(expr.name)
+        self._compile_literal_expr(LiteralExpr(expr.value))
+        self._line = expr.operator.line
+        self._emit(BINARY_OPCODES[expr.operator.token_type])
+
+    def _compile_get_expr(self, expr: GetExpr) -> None:
+        self._compile(expr.obj)
+        self._line = expr.name.line
+        self._emit(OpCode.GET_PROPERTY, self._constant(expr.name), self._constant(expr.cache))
+
+    def _compile_increment_expr(self, expr: IncrementExpr) -> None:
+        slot = self._resolve_local(self._state, expr.name.lexeme)
+        assert slot is not None
+        self._line = expr.operator.line
+        self._emit(
+            OpCode.INCREMENT_LOCAL, slot, self._constant(expr.delta), BINARY_OPCODES[expr.operator.token_type]
+        )
+
+    def _compile_index_expr(self, expr: IndexExpr) -> None:
+        self._compile(expr.obj)
+        self._compile(expr.index)
+        self._line = expr.bracket.line
+        self._emit(OpCode.GET_INDEX)
+
+    def _compile_index_set_expr(self, expr: IndexSetExpr) -> None:
+        self._compile(expr.obj)
+        self._compile(expr.index)
+        self._compile(expr.value)
+        self._line = expr.bracket.line
+        self._emit(OpCode.SET_INDEX)
+
+    def _compile_list_expr(self, expr: ListExpr) -> None:
+        for element in expr.elements:
+            self._compile(element)
+        self._line = expr.bracket.line
+        self._emit(OpCode.BUILD_LIST, len(expr.elements))
+
+    def _compile_literal_expr(self, expr: LiteralExpr) -> None:
+        if expr.value is None:
+            self._emit(OpCode.NIL)
+        elif expr.value is True:
+            self._emit(OpCode.TRUE)
+        elif expr.value is False:
+            self._emit(OpCode.FALSE)
+        else:
+            self._emit(OpCode.CONSTANT, self._constant(expr.value))
+
+    def _compile_logical_expr(self, expr: LogicalExpr) -> None:
+        self._compile(expr.left)
+        if expr.operator.token_type == TokenType.OR:
+            else_jump = self._emit_jump(OpCode.JUMP_IF_FALSE)
+            end_jump = self._emit_jump(OpCode.JUMP)
+            self._patch_jump(else_jump)
+        else:
+            end_jump = self._emit_jump(OpCode.JUMP_IF_FALSE)
+        self._emit(OpCode.POP)
+        self._compile(expr.right)
+        self._patch_jump(end_jump)
+
+    def _compile_set_expr(self, expr: SetExpr) -> None:
+        self._compile(expr.obj)
+        self._line = expr.name.line
+        if not isinstance(expr.obj, ThisExpr):
+            self._emit(OpCode.CHECK_FIELDS)
+        self._compile(expr.value)
+        self._line = expr.name.line
+        self._emit(OpCode.SET_PROPERTY, self._constant(expr.name), self._constant(expr.cache))
+
+    def _compile_super_expr(self, expr: SuperExpr) -> None:
+        self._emit_get_variable(Token(TokenType.THIS, "this", None, expr.keyword.line))
+        self._emit_get_variable(expr.keyword)
+        self._line = expr.method.line
+        self._emit(OpCode.GET_SUPER, self._constant(expr.method), self._constant(expr.cache))
+
+    def _compile_unary_expr(self, expr: UnaryExpr) -> None:
+        self._compile(expr.right)
+        self._line = expr.operator.line
+        if expr.operator.token_type == TokenType.BANG:
+            self._emit(OpCode.NOT)
+        else:
+            self._emit(OpCode.NEGATE)
+
+    def _compile_block_stmt(self, stmt: BlockStmt) -> None:
+        self._begin_scope()
+        for statement in stmt.statements:
+            self._compile(statement)
+        self._end_scope()
+
+    def _compile_class_stmt(self, stmt: ClassStmt) -> None:
+        self._line = stmt.name.line
+        is_local = self._state.scope_depth > 0
+        if is_local:
+            self._emit(OpCode.NIL)
+            self._add_local(stmt.name.lexeme)
+
+        if stmt.superclass is not None:
+            self._emit_get_variable(stmt.superclass.name)
+            self._begin_scope()
+            self._add_local("super")
+
+        for method in stmt.methods:
+            function_type = FunctionType.INITIALIZER if method.name.lexeme == "init" else FunctionType.METHOD
+            self._compile_function(method, function_type)
+
+        self._line = stmt.name.line if stmt.superclass is None else stmt.superclass.name.line
+        self._emit(
+            OpCode.CLASS,
+            self._constant(stmt.name.lexeme),
+            len(stmt.methods),
+            int(stmt.superclass is not None),
+        )
+
+        if is_local:
+            self._emit(OpCode.SET_LOCAL, self._resolve_local(self._state, stmt.name.lexeme), OpCode.POP)
+        else:
+            self._emit(OpCode.DEFINE_GLOBAL, self._globals.slot(stmt.name.lexeme))
+
+        if stmt.superclass is not None:
+            self._end_scope()
+
+    def _compile_expression_stmt(self, stmt: ExpressionStmt) -> None:
+        self._compile(stmt.expression)
+        self._emit(OpCode.POP)
+
+    def _compile_for_stmt(self, stmt: ForStmt) -> None:
+        self._compile_while_stmt(WhileStmt(stmt.condition, BlockStmt([stmt.body, ExpressionStmt(stmt.increment)])))
+
+    def _compile_function_stmt(self, stmt: FunctionStmt) -> None:
+        is_local = self._state.scope_depth > 0
+        if is_local:
+            self._add_local(stmt.name.lexeme)
+        self._compile_function(stmt, FunctionType.FUNCTION)
+        if not is_local:
+            self._emit(OpCode.DEFINE_GLOBAL, self._globals.slot(stmt.name.lexeme))
+
+    def _compile_if_stmt(self, stmt: IfStmt) -> None:
+        self._compile(stmt.condition)
+        then_jump = self._emit_jump(OpCode.JUMP_IF_FALSE)
+        self._emit(OpCode.POP)
+        self._compile(stmt.then_branch)
+        else_jump = self._emit_jump(OpCode.JUMP)
+        self._patch_jump(then_jump)
+        self._emit(OpCode.POP)
+        if stmt.else_branch is not None:
+            self._compile(stmt.else_branch)
+        self._patch_jump(else_jump)
+
+    def _compile_print_stmt(self, stmt: PrintStmt) -> None:
+        self._compile(stmt.expression)
+        self._emit(OpCode.PRINT)
+
+    def _compile_return_stmt(self, stmt: ReturnStmt) -> None:
+        if self._state.function_type == FunctionType.INITIALIZER:
+            self._emit(OpCode.GET_LOCAL, 0)
+        elif stmt.value is not None:
+            self._compile(stmt.value)
+            if stmt.value in self._tail_calls:
+                code = self._state.function.chunk.code
+                code[-2] = TAIL_OPCODES[code[-2]]
+        else:
+            self._emit(OpCode.NIL)
+        self._emit(OpCode.RETURN)
+
+    def _compile_var_stmt(self, stmt: VarStmt) -> None:
+        if stmt.initializer is None:
+            self._emit(OpCode.NIL)
+        else:
+            self._compile(stmt.initializer)
+
+        if self._state.scope_depth > 0:
+            self._add_local(stmt.name.lexeme)
+        else:
+            self._emit(OpCode.DEFINE_GLOBAL, self._globals.slot(stmt.name.lexeme))
+
+    def _compile_while_stmt(self, stmt: WhileStmt) -> None:
+        loop_start = len(self._state.function.chunk.code)
+        self._compile(stmt.condition)
+        exit_jump = self._emit_jump(OpCode.JUMP_IF_FALSE)
+        self._emit(OpCode.POP)
+        self._compile(stmt.body)
+        self._emit(OpCode.JUMP, loop_start)
+        self._patch_jump(exit_jump)
+        self._emit(OpCode.POP)
+
+    def _compile_function(self, stmt: FunctionStmt, function_type: FunctionType) -> None:
+        self._begin_function(stmt.name.lexeme, function_type)
+        self._begin_scope()
+        self._state.function.arity = len(stmt.params)
+        for param in stmt.params:
+            self._add_local(param.lexeme)
+        for statement in stmt.body:
+            self._compile(statement)
+        function, upvalues = self._end_function()
+
+        self._emit(OpCode.CLOSURE, self._constant(function))
+        for is_local, index in upvalues:
+            self._emit(int(is_local), index)
+
+    def _begin_function(self, name: str | None, function_type: FunctionType) -> None:
+        receiver = "this" if function_type in (FunctionType.INITIALIZER, FunctionType.METHOD) else ""
+        self._state = FunctionState(FunctionProto(name), function_type, self._state, [Local(receiver, 0)])
+
+    def _end_function(self) -> tuple[FunctionProto, list[tuple[bool, int]]]:
+        if self._state.function_type == FunctionType.INITIALIZER:
+            self._emit(OpCode.GET_LOCAL, 0)
+        else:
+            self._emit(OpCode.NIL)
+        self._emit(OpCode.RETURN)
+
+        state = self._state
+        state.function.upvalue_count = len(state.upvalues)
+        self._state = state.enclosing
+        return state.function, state.upvalues
+
+    def _begin_scope(self) -> None:
+        self._state.scope_depth += 1
+
+    def _end_scope(self) -> None:
+        state = self._state
+        state.scope_depth -= 1
+        while state.locals and state.locals[-1].depth > state.scope_depth:
+            self._emit(OpCode.CLOSE_UPVALUE if state.locals[-1].is_captured else OpCode.POP)
+            state.locals.pop()
+
+    def _add_local(self, name: str) -> None:
+        self._state.locals.append(Local(name, self._state.scope_depth))
+
+    def _emit_get_variable(self, name: Token) -> None:
+        self._line = name.line
+        if (slot := self._resolve_local(self._state, name.lexeme)) is not None:
+            self._emit(OpCode.GET_LOCAL, slot)
+        elif (index := self._resolve_upvalue(self._state, name.lexeme)) is not None:
+            self._emit(OpCode.GET_UPVALUE, index)
+        else:
+            self._emit(OpCode.GET_GLOBAL, self._globals.slot(name.lexeme))
+
+    def _emit_set_variable(self, name: Token) -> None:
+        self._line = name.line
+        if (slot := self._resolve_local(self._state, name.lexeme)) is not None:
+            self._emit(OpCode.SET_LOCAL, slot)
+        elif (index := self._resolve_upvalue(self._state, name.lexeme)) is not None:
+            self._emit(OpCode.SET_UPVALUE, index)
+        else:
+            self._emit(OpCode.SET_GLOBAL, self._globals.slot(name.lexeme))
+
+    def _resolve_local(self, state: FunctionState, name: str) -> int | None:
+        for slot in range(len(state.locals) - 1, -1, -1):
+            if state.locals[slot].name == name:
+                return slot
+        return None
+
+    def _resolve_upvalue(self, state: FunctionState, name: str) -> int | None:
+        if state.enclosing is None:
+            return None
+
+        if (slot := self._resolve_local(state.enclosing, name)) is not None:
+            state.enclosing.locals[slot].is_captured = True
+            return self._add_upvalue(state, True, slot)
+
+        if (index := self._resolve_upvalue(state.enclosing, name)) is not None:
+            return self._add_upvalue(state, False, index)
+
+        return None
+
+    def _add_upvalue(self, state: FunctionState, is_local: bool, index: int) -> int:
+        upvalue = (is_local, index)
+        if upvalue in state.upvalues:
+            return state.upvalues.index(upvalue)
+        state.upvalues.append(upvalue)
+        return len(state.upvalues) - 1
+
+    def _emit(self, *words: int) -> None:
+        chunk = self._state.function.chunk
+        for word in words:
+            chunk.write(int(word), self._line)
+
+    def _emit_jump(self, opcode: OpCode) -> int:
+        self._emit(opcode, 0)
+        return len(self._state.function.chunk.code) - 1
+
+    def _patch_jump(self, offset: int) -> None:
+        code = self._state.function.chunk.code
+        code[offset] = len(code)
+
+    def _constant(self, value: Any) -> int:
+        return self._state.function.chunk.add_constant(value)
@@ -5,41 +5,66 @@ from .error import runtime_error
 from .token import Token
 
 
-class Environment:
-    def __init__(self, enclosing: Environment | None = None) -> None:
-        self.enclosing = enclosing
-        self._values: dict[str, Any] = {}
+GLOBAL = -1
+
+UNDEFINED: Any = object()
+
+
+class GlobalEnvironment:
+    def __init__(self) -> None:
+        self.slots: dict[str, int] = {}
+        self.names: list[str] = []
+        self.values: list[Any] = []
+
+    def slot(self, name: str) -> int:
+        slot = self.slots.get(name)
+        if slot is None:
+            slot = self.slots[name] = len(self.values)
+            self.names.append(name)
+            self.values.append(UNDEFINED)
+        return slot
 
     def define(self, name: str, value: Any) -> None:
-        self._values[name] = value
+        self.values[self.slot(name)] = value
 
     def get(self, name: Token) -> Any:
-        if name.lexeme in self._values:
-            return self._values[name.lexeme]
+        return self.get_at(self.slot(name.lexeme), name)
 
-        if self.enclosing is not None:
-            return self.enclosing.get(name)
+    def get_at(self, slot: int, name: Token) -> Any:
+        value = self.values[slot]
+        if value is UNDEFINED:
+            runtime_error(name, f"Undefined variable '{name.lexeme}'.")
+        return value
 
-        runtime_error(name, f"Undefined variable '{name.lexeme}'.")
+    def assign(self, name: Token, value: Any) -> None:
+        self.assign_at(self.slot(name.lexeme), name, value)
 
-    def get_at(self, distance: int, name: str) -> Any:
-        return self._ancestor(distance)._values[name]
+    def assign_at(self, slot: int, name: Token, value: Any) -> None:
+        if self.values[slot] is UNDEFINED:
+            runtime_error(name, f"Undefined variable '{name.lexeme}'.")
+        self.values[slot] = value
 
-    def assign(self, name: Token, value: Any) -> None:
-        if name.lexeme in self._values:
-            self._values[name.lexeme] = value
-            return
 
-        if self.enclosing is not None:
-            self.enclosing.assign(name, value)
-            return
+class Environment:
+    __slots__ = ("enclosing", "values")
+
+    def __init__(self, enclosing: Environment | GlobalEnvironment, values: list[Any] | None = None) -> None:
+        self.enclosing = enclosing
+        self.values = [] if values is None else values
+
+    def define(self, value: Any) -> None:
+        self.values.append(value)
 
-        runtime_error(name, f"Undefined variable '{name.lexeme}'.")
+    def get_at(self, distance: int, slot: int) -> Any:
+        environment = self
+        for _ in range(distance):
+            environment = environment.enclosing
+        return environment.values[slot]
 
-    def assign_at(self, distance: int, name: Token, value: Any) -> None:
-        self._ancestor(distance)._values[name.lexeme] = value
+    def assign_at(self, distance: int, slot: int, value: Any) -> None:
+        self.ancestor(distance).values[slot] = value
 
-    def _ancestor(self, distance: int) -> Environment:
+    def ancestor(self, distance: int) -> Environment:
         environment = self
         for _ in range(distance):
             environment = environment.enclosing
@@ -14,6 +14,17 @@ def error(location: int | Token, message: str) -> None:
         report(location.line, where)
 
 
-def runtime_error(token: Token, message: str) -> None:
-    print("{}\n[line {}]".format(message, token.line), file=sys.stderr)
-    raise RuntimeError
+class LoxRuntimeError(RuntimeError):
+    def __init__(self, line: int, message: str) -> None:
+        super().__init__(message)
+        self.line = line
+        self.message = message
+
+
+def runtime_error(location: int | Token, message: str) -> None:
+    line = location if isinstance(location, int) else location.line
+    raise LoxRuntimeError(line, message)
+
+
+def report_runtime_error(ex: LoxRuntimeError) -> None:
+    print("{}\n[line {}]".format(ex.message, ex.line), file=sys.stderr)
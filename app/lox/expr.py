@@ -1,6 +1,7 @@
 import dataclasses
 from typing import Any
 
+from .inline_cache import InlineCache
 from .token import Token
 
 
@@ -8,9 +9,14 @@ __all__ = [
     "AssignExpr",
     "BinaryExpr",
     "CallExpr",
+    "CompareConstantExpr",
     "Expr",
     "GetExpr",
     "GroupingExpr",
+    "IncrementExpr",
+    "IndexExpr",
+    "IndexSetExpr",
+    "ListExpr",
     "LiteralExpr",
     "LogicalExpr",
     "SetExpr",
@@ -45,10 +51,18 @@ class CallExpr(Expr):
     arguments: list[Expr]
 
 
+@dataclasses.dataclass(eq=False, frozen=True)
+class CompareConstantExpr(Expr):
+    name: Token
+    operator: Token
+    value: Any
+
+
 @dataclasses.dataclass(eq=False, frozen=True)
 class GetExpr(Expr):
     obj: Expr
     name: Token
+    cache: InlineCache = dataclasses.field(default_factory=InlineCache, repr=False)
 
 
 @dataclasses.dataclass(eq=False, frozen=True)
@@ -56,6 +70,34 @@ class GroupingExpr(Expr):
     expression: Expr
 
 
+@dataclasses.dataclass(eq=False, frozen=True)
+class IncrementExpr(Expr):
+    name: Token
+    operator: Token
+    delta: float
+
+
+@dataclasses.dataclass(eq=False, frozen=True)
+class IndexExpr(Expr):
+    obj: Expr
+    bracket: Token
+    index: Expr
+
+
+@dataclasses.dataclass(eq=False, frozen=True)
+class IndexSetExpr(Expr):
+    obj: Expr
+    bracket: Token
+    index: Expr
+    value: Expr
+
+
+@dataclasses.dataclass(eq=False, frozen=True)
+class ListExpr(Expr):
+    bracket: Token
+    elements: list[Expr]
+
+
 @dataclasses.dataclass(eq=False, frozen=True)
 class LiteralExpr(Expr):
     value: Any
@@ -73,12 +115,14 @@ class SetExpr(Expr):
     obj: Expr
     name: Token
     value: Expr
+    cache: InlineCache = dataclasses.field(default_factory=InlineCache, repr=False)
 
 
 @dataclasses.dataclass(eq=False, frozen=True)
 class SuperExpr(Expr):
     keyword: Token
     method: Token
+    cache: InlineCache = dataclasses.field(default_factory=InlineCache, repr=False)
 
 
 @dataclasses.dataclass(eq=False, frozen=True)
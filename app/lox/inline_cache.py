@@ -0,0 +1,12 @@
+from typing import Any
+
+
+class InlineCache:
+    __slots__ = ("key", "value")
+
+    def __init__(self) -> None:
+        self.key: Any = None
+        self.value: Any = None
+
+    def __reduce__(self) -> tuple[type, tuple]:
+        return InlineCache, ()
@@ -1,50 +1,122 @@
+import contextlib
+import sys
+from collections.abc import Iterator, MutableMapping
 from typing import Any
 
-from .environment import Environment
-from .error import runtime_error
+from .environment import GLOBAL, Environment, GlobalEnvironment
+from .error import LoxRuntimeError, report_runtime_error, runtime_error
 from .expr import *
-from .lox_callable import LoxCallable, LoxClock
+from .lox_callable import LoxCallable
 from .lox_class import LoxClass, LoxInstance
-from .lox_function import LoxFunction
-from .return_exception import ReturnException
+from .lox_function import LoxBoundMethod, LoxFunction
+from .lox_list import LoxList
+from .lox_map import LoxMap
+from .natives import NativeError, Natives
+from .output import Output
+from .return_value import ReturnValue, TailCall
+from .rope import Rope, concat
+from .stdlib import standard_library
 from .stmt import *
 from .token import Token, TokenType
 
 
+DEFAULT_MAX_DEPTH = 4096
+
+HOST_FRAMES_PER_CALL = 32
+
+
 class Interpreter:
-    def __init__(self) -> None:
-        self.globals = Environment()
-        self.globals.define("clock", LoxClock())
-        self._environment = self.globals
-        self._locals: dict[Expr, int] = {}
+    def __init__(
+        self, output: Output | None = None, max_depth: int = DEFAULT_MAX_DEPTH, natives: Natives | None = None
+    ) -> None:
+        self.output = Output() if output is None else output
+        self.max_depth = max_depth
+        self.call_depth = 0
+        self._call_line = 0
+        self.globals = GlobalEnvironment()
+        (standard_library() if natives is None else natives).install(self.globals)
+        self._environment: Environment | GlobalEnvironment = self.globals
+        self._locals: MutableMapping[Expr, tuple[int, int]] = {}
+        self.tail_calls: set[Expr] = set()
+
+    @property
+    def locals(self) -> MutableMapping[Expr, tuple[int, int]]:
+        return self._locals
+
+    @locals.setter
+    def locals(self, locals: MutableMapping[Expr, tuple[int, int]]) -> None:
+        self._locals = locals
 
     def interpret_expr(self, expr: Expr) -> None:
-        value = self._evaluate(expr)
-        print(self._stringify(value))
+        with self._reporting_errors():
+            value = self._evaluate(expr)
+            self.output.write_line(self._stringify(value))
 
     def interpret_stmts(self, stmts: list[Stmt]) -> None:
+        with self._reporting_errors():
+            self._execute_program(stmts)
+
+    @contextlib.contextmanager
+    def _reporting_errors(self) -> Iterator[None]:
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(limit, self.max_depth * HOST_FRAMES_PER_CALL))
+        try:
+            yield
+        except LoxRuntimeError as ex:
+            self.output.flush()
+            report_runtime_error(ex)
+            raise
+        except RecursionError:
+            self.output.flush()
+            overflow = LoxRuntimeError(self._current_line(), "Stack overflow.")
+            report_runtime_error(overflow)
+            raise overflow from None
+        finally:
+            sys.setrecursionlimit(limit)
+            self.output.flush()
+
+    def _current_line(self) -> int:
+        return self._call_line
+
+    def _execute_program(self, stmts: list[Stmt]) -> None:
         for stmt in stmts:
             self._execute(stmt)
 
-    def execute_block(self, statements: list[Stmt], environment: Environment) -> None:
+    def execute_block(self, statements: list[Stmt], environment: Environment) -> ReturnValue | None:
         previous = self._environment
         try:
             self._environment = environment
             for stmt in statements:
-                self._execute(stmt)
+                completion = self._execute(stmt)
+                if completion is not None:
+                    return completion
         finally:
             self._environment = previous
 
-    def resolve(self, expr: Expr, depth: int) -> None:
-        self._locals[expr] = depth
+    def evaluate(self, expr: Expr) -> Any:
+        return self._evaluate(expr)
+
+    def is_truthy(self, value: Any) -> bool:
+        return self._is_truthy(value)
+
+    def stringify(self, value: Any) -> str:
+        return self._stringify(value)
+
+    def resolve(self, expr: Expr, depth: int, slot: int) -> None:
+        self._locals[expr] = (depth, slot)
 
-    def _execute(self, stmt: Stmt) -> None:
+    def resolve_tail_call(self, expr: CallExpr) -> None:
+        self.tail_calls.add(expr)
+
+    def _execute(self, stmt: Stmt) -> ReturnValue | None:
         if isinstance(stmt, BlockStmt):
             return self._execute_block_stmt(stmt)
         if isinstance(stmt, ClassStmt):
             return self._execute_class_stmt(stmt)
         if isinstance(stmt, ExpressionStmt):
             return self._execute_expression_stmt(stmt)
+        if isinstance(stmt, ForStmt):
+            return self._execute_for_stmt(stmt)
         if isinstance(stmt, FunctionStmt):
             return self._execute_function_stmt(stmt)
         if isinstance(stmt, IfStmt):
@@ -58,8 +130,8 @@ class Interpreter:
         if isinstance(stmt, WhileStmt):
             return self._execute_while_stmt(stmt)
 
-    def _execute_block_stmt(self, stmt: BlockStmt) -> None:
-        self.execute_block(stmt.statements, Environment(self._environment))
+    def _execute_block_stmt(self, stmt: BlockStmt) -> ReturnValue | None:
+        return self.execute_block(stmt.statements, Environment(self._environment))
 
     def _execute_class_stmt(self, stmt: ClassStmt) -> None:
         superclass = None
@@ -68,56 +140,72 @@ class Interpreter:
             if not isinstance(superclass, LoxClass):
                 runtime_error(stmt.superclass.name, "Superclass must be a class.")
 
-        self._environment.define(stmt.name.lexeme, None)
-
-        if stmt.superclass is not None:
-            self._environment = Environment(self._environment)
-            self._environment.define("super", superclass)
+        closure = self._environment
+        if superclass is not None:
+            closure = Environment(self._environment, [superclass])
 
         methods: dict[str, LoxFunction] = {}
         for method in stmt.methods:
             is_initializer = method.name.lexeme == "init"
-            function = LoxFunction(method, self._environment, is_initializer)
+            function = self._make_function(method, closure, is_initializer)
             methods[method.name.lexeme] = function
 
-        klass = LoxClass(stmt.name.lexeme, superclass, methods)
-
-        if superclass is not None:
-            self._environment = self._environment.enclosing
-
-        self._environment.assign(stmt.name, klass)
+        self._define(stmt.name, LoxClass(stmt.name.lexeme, superclass, methods))
 
     def _execute_expression_stmt(self, stmt: ExpressionStmt) -> None:
         self._evaluate(stmt.expression)
 
+    def _execute_for_stmt(self, stmt: ForStmt) -> ReturnValue | None:
+        previous = self._environment
+        environment = Environment(previous)
+        try:
+            while self._is_truthy(self._evaluate(stmt.condition)):
+                self._environment = environment
+                completion = self._execute(stmt.body)
+                if completion is not None:
+                    return completion
+                self._evaluate(stmt.increment)
+                self._environment = previous
+        finally:
+            self._environment = previous
+
     def _execute_function_stmt(self, stmt: FunctionStmt) -> None:
-        function = LoxFunction(stmt, self._environment, is_initializer=False)
-        self._environment.define(stmt.name.lexeme, function)
+        function = self._make_function(stmt, self._environment, is_initializer=False)
+        self._define(stmt.name, function)
+
+    def _make_function(
+        self, declaration: FunctionStmt, closure: Environment | GlobalEnvironment, is_initializer: bool
+    ) -> LoxFunction:
+        return LoxFunction(declaration, closure, is_initializer)
 
-    def _execute_if_stmt(self, stmt: IfStmt) -> None:
+    def _execute_if_stmt(self, stmt: IfStmt) -> ReturnValue | None:
         if self._is_truthy(self._evaluate(stmt.condition)):
-            self._execute(stmt.then_branch)
-        elif stmt.else_branch is not None:
-            self._execute(stmt.else_branch)
+            return self._execute(stmt.then_branch)
+        if stmt.else_branch is not None:
+            return self._execute(stmt.else_branch)
 
     def _execute_print_stmt(self, stmt: PrintStmt) -> None:
-        print(self._stringify(self._evaluate(stmt.expression)))
+        self.output.write_line(self._stringify(self._evaluate(stmt.expression)))
 
-    def _execute_return_stmt(self, stmt: ReturnStmt) -> None:
-        value = None
-        if stmt.value is not None:
-            value = self._evaluate(stmt.value)
-        raise ReturnException(value)
+    def _execute_return_stmt(self, stmt: ReturnStmt) -> ReturnValue | TailCall:
+        expr = stmt.value
+        if expr is None:
+            return ReturnValue(None)
+        if expr in self.tail_calls:
+            return self._evaluate_tail_call(expr)
+        return ReturnValue(self._evaluate(expr))
 
     def _execute_var_stmt(self, stmt: VarStmt) -> None:
         value = None
         if stmt.initializer is not None:
             value = self._evaluate(stmt.initializer)
-        self._environment.define(stmt.name.lexeme, value)
+        self._define(stmt.name, value)
 
-    def _execute_while_stmt(self, stmt: WhileStmt) -> None:
+    def _execute_while_stmt(self, stmt: WhileStmt) -> ReturnValue | None:
         while self._is_truthy(self._evaluate(stmt.condition)):
-            self._execute(stmt.body)
+            completion = self._execute(stmt.body)
+            if completion is not None:
+                return completion
 
     def _evaluate(self, expr: Expr) -> Any:
         if isinstance(expr, AssignExpr):
@@ -126,10 +214,14 @@ class Interpreter:
             return self._evaluate_binary_expr(expr)
         if isinstance(expr, CallExpr):
             return self._evaluate_call_expr(expr)
+        if isinstance(expr, CompareConstantExpr):
+            return self._evaluate_compare_constant_expr(expr)
         if isinstance(expr, GetExpr):
             return self._evaluate_get_expr(expr)
         if isinstance(expr, GroupingExpr):
             return self._evaluate_grouping_expr(expr)
+        if isinstance(expr, IncrementExpr):
+            return self._evaluate_increment_expr(expr)
         if isinstance(expr, LiteralExpr):
             return self._evaluate_literal_expr(expr)
         if isinstance(expr, LogicalExpr):
@@ -144,14 +236,24 @@ class Interpreter:
             return self._evaluate_unary_expr(expr)
         if isinstance(expr, VariableExpr):
             return self._evaluate_variable_expr(expr)
+        if isinstance(expr, IndexExpr):
+            return self._evaluate_index_expr(expr)
+        if isinstance(expr, IndexSetExpr):
+            return self._evaluate_index_set_expr(expr)
+        if isinstance(expr, ListExpr):
+            return self._evaluate_list_expr(expr)
 
     def _evaluate_assign_expr(self, expr: AssignExpr) -> Any:
         value = self._evaluate(expr.value)
-        distance = self._locals.get(expr)
-        if distance is None:
+        location = self._locals.get(expr)
+        if location is None:
             self.globals.assign(expr.name, value)
+            return value
+        distance, slot = location
+        if distance == GLOBAL:
+            self.globals.assign_at(slot, expr.name, value)
         else:
-            self._environment.assign_at(distance, expr.name, value)
+            self._environment.assign_at(distance, slot, value)
         return value
 
     def _evaluate_binary_expr(self, expr: BinaryExpr) -> Any:
@@ -178,9 +280,10 @@ class Interpreter:
                 self._check_number_operands(expr.operator, left, right)
                 return left - right
             case TokenType.PLUS:
-                if (isinstance(left, str) and isinstance(right, str)) or \
-                        (isinstance(left, float) and isinstance(right, float)):
+                if isinstance(left, float) and isinstance(right, float):
                     return left + right
+                if isinstance(left, (str, Rope)) and isinstance(right, (str, Rope)):
+                    return concat(left, right)
                 runtime_error(expr.operator, "Operands must be two numbers or two strings.")
             case TokenType.SLASH:
                 self._check_number_operands(expr.operator, left, right)
@@ -190,27 +293,161 @@ class Interpreter:
                 return left * right
 
     def _evaluate_call_expr(self, expr: CallExpr) -> Any:
+        if isinstance(expr.callee, GetExpr):
+            return self._evaluate_invoke(expr, expr.callee)
+        if isinstance(expr.callee, SuperExpr):
+            return self._evaluate_super_invoke(expr, expr.callee)
+
         callee = self._evaluate(expr.callee)
         arguments = [self._evaluate(argument) for argument in expr.arguments]
+        return self._call(callee, arguments, expr.paren)
+
+    def _evaluate_invoke(self, expr: CallExpr, callee: GetExpr) -> Any:
+        obj = self._evaluate(callee.obj)
+        if isinstance(obj, LoxInstance):
+            method = obj.find_member(callee.name.lexeme, callee.cache)
+            if method is not None and type(method) is not int:
+                arguments = [self._evaluate(argument) for argument in expr.arguments]
+                self._check_call(method, arguments, expr.paren)
+                return method.call_method(self, obj, arguments)
+
+        function = self._get_property(obj, callee)
+        arguments = [self._evaluate(argument) for argument in expr.arguments]
+        return self._call(function, arguments, expr.paren)
+
+    def _evaluate_super_invoke(self, expr: CallExpr, callee: SuperExpr) -> Any:
+        instance, method = self._find_super_method(callee)
+        arguments = [self._evaluate(argument) for argument in expr.arguments]
+        self._check_call(method, arguments, expr.paren)
+        return method.call_method(self, instance, arguments)
+
+    def _evaluate_tail_call(self, expr: CallExpr) -> ReturnValue | TailCall:
+        callee = expr.callee
+        if isinstance(callee, SuperExpr):
+            instance, method = self._find_super_method(callee)
+            arguments = [self._evaluate(argument) for argument in expr.arguments]
+            self._check_arity(method, arguments, expr.paren)
+            arguments.insert(0, instance)
+            return TailCall(method, arguments)
+
+        if isinstance(callee, GetExpr):
+            obj = self._evaluate(callee.obj)
+            if isinstance(obj, LoxInstance):
+                method = obj.find_member(callee.name.lexeme, callee.cache)
+                if method is not None and type(method) is not int:
+                    arguments = [self._evaluate(argument) for argument in expr.arguments]
+                    self._check_arity(method, arguments, expr.paren)
+                    arguments.insert(0, obj)
+                    return TailCall(method, arguments)
+            function = self._get_property(obj, callee)
+        else:
+            function = self._evaluate(callee)
 
+        arguments = [self._evaluate(argument) for argument in expr.arguments]
+        return self._tail_call(function, arguments, expr.paren)
+
+    def _tail_call(self, callee: Any, arguments: list[Any], paren: Token) -> ReturnValue | TailCall:
+        if isinstance(callee, LoxFunction):
+            self._check_arity(callee, arguments, paren)
+            return TailCall(callee, arguments)
+        if isinstance(callee, LoxBoundMethod):
+            self._check_arity(callee, arguments, paren)
+            arguments.insert(0, callee.receiver)
+            return TailCall(callee.method, arguments)
+        return ReturnValue(self._call(callee, arguments, paren))
+
+    def _call(self, callee: Any, arguments: list[Any], paren: Token) -> Any:
         if not isinstance(callee, LoxCallable):
-            runtime_error(expr.paren, "Can only call functions and classes.")
-        if len(arguments) != callee.arity:
-            runtime_error(
-                expr.paren, "Expected {} arguments but got {}.".format(callee.arity, len(arguments))
-            )
+            runtime_error(paren, "Can only call functions and classes.")
+        self._check_call(callee, arguments, paren)
+        try:
+            return callee.call(self, arguments)
+        except NativeError as ex:
+            runtime_error(paren, ex.message)
 
-        return callee.call(self, arguments)
+    def _evaluate_compare_constant_expr(self, expr: CompareConstantExpr) -> Any:
+        left = self._look_up_variable(expr.name, expr)
+        right = expr.value
+        match expr.operator.token_type:
+            case TokenType.BANG_EQUAL:
+                return left != right
+            case TokenType.EQUAL_EQUAL:
+                return left == right
+            case TokenType.GREATER:
+                self._check_number_operands(expr.operator, left, right)
+                return left > right
+            case TokenType.GREATER_EQUAL:
+                self._check_number_operands(expr.operator, left, right)
+                return left >= right
+            case TokenType.LESS:
+                self._check_number_operands(expr.operator, left, right)
+                return left < right
+            case TokenType.LESS_EQUAL:
+                self._check_number_operands(expr.operator, left, right)
+                return left <= right
 
     def _evaluate_get_expr(self, expr: GetExpr) -> Any:
-        obj = self._evaluate(expr.obj)
+        return self._get_property(self._evaluate(expr.obj), expr)
+
+    def _get_property(self, obj: Any, expr: GetExpr) -> Any:
         if isinstance(obj, LoxInstance):
-            return obj.get(expr.name)
-        runtime_error(expr.name, "Only instances have properties.")
+            return obj.get(expr.name, expr.cache)
+        return self._get_builtin_property(obj, expr.name)
+
+    def _get_builtin_property(self, obj: Any, name: Token) -> Any:
+        if isinstance(obj, (LoxList, LoxMap)):
+            return obj.get(name)
+        runtime_error(name, "Only instances have properties.")
 
     def _evaluate_grouping_expr(self, expr: GroupingExpr) -> Any:
         return self._evaluate(expr.expression)
 
+    def _evaluate_increment_expr(self, expr: IncrementExpr) -> Any:
+        distance, slot = self._locals[expr]
+        values = self._environment.ancestor(distance).values
+        value = values[slot]
+        self._check_increment_operand(expr.operator, value)
+        value = values[slot] = value + expr.delta
+        return value
+
+    def _evaluate_index_expr(self, expr: IndexExpr) -> Any:
+        obj = self._evaluate(expr.obj)
+        return self._get_index(obj, self._evaluate(expr.index), expr.bracket)
+
+    def _evaluate_index_set_expr(self, expr: IndexSetExpr) -> Any:
+        obj = self._evaluate(expr.obj)
+        index = self._evaluate(expr.index)
+        value = self._evaluate(expr.value)
+        self._set_index(obj, index, value, expr.bracket)
+        return value
+
+    def _evaluate_list_expr(self, expr: ListExpr) -> Any:
+        return LoxList([self._evaluate(element) for element in expr.elements])
+
+    def _get_index(self, obj: Any, index: Any, bracket: int | Token) -> Any:
+        if isinstance(obj, LoxList):
+            return obj.elements[self._list_index(obj, index, bracket)]
+        if isinstance(obj, LoxMap):
+            return obj.get_item(index)
+        runtime_error(bracket, "Only lists and maps can be indexed.")
+
+    def _set_index(self, obj: Any, index: Any, value: Any, bracket: int | Token) -> None:
+        if isinstance(obj, LoxList):
+            obj.elements[self._list_index(obj, index, bracket)] = value
+            return
+        if isinstance(obj, LoxMap):
+            obj.set_item(index, value)
+            return
+        runtime_error(bracket, "Only lists and maps can be indexed.")
+
+    def _list_index(self, obj: LoxList, index: Any, bracket: int | Token) -> int:
+        if not isinstance(index, float) or not index.is_integer():
+            runtime_error(bracket, "Index must be an integer.")
+        position = int(index)
+        if not 0 <= position < len(obj.elements):
+            runtime_error(bracket, "Index out of range.")
+        return position
+
     def _evaluate_literal_expr(self, expr: LiteralExpr) -> Any:
         return expr.value
 
@@ -230,20 +467,25 @@ class Interpreter:
             runtime_error(expr.name, "Only instances have fields.")
 
         value = self._evaluate(expr.value)
-        obj.set(expr.name, value)
+        obj.set(expr.name, value, expr.cache)
         return value
 
     def _evaluate_super_expr(self, expr: SuperExpr) -> Any:
-        distance = self._locals.get(expr)
-        superclass = self._environment.get_at(distance, "super")
-        assert isinstance(superclass, LoxClass)
-        instance = self._environment.get_at(distance - 1, "this")
+        instance, method = self._find_super_method(expr)
+        return method.bind(instance)
+
+    def _find_super_method(self, expr: SuperExpr) -> tuple[LoxInstance, LoxFunction]:
+        distance, slot = self._locals[expr]
+        environment = self._environment.ancestor(distance - 1)
+        instance = environment.values[0]
         assert isinstance(instance, LoxInstance)
+        superclass = environment.enclosing.values[slot]
+        assert isinstance(superclass, LoxClass)
 
-        method = superclass.find_method(expr.method.lexeme)
+        method = superclass.find_method(expr.method.lexeme, expr.cache)
         if method is None:
             runtime_error(expr.method, "Undefined property '" + expr.method.lexeme + "'.")
-        return method.bind(instance)
+        return instance, method
 
     def _evaluate_this_expr(self, expr: ThisExpr) -> Any:
         return self._look_up_variable(expr.keyword, expr)
@@ -261,11 +503,19 @@ class Interpreter:
         return self._look_up_variable(expr.name, expr)
 
     def _look_up_variable(self, name: Token, expr: Expr) -> Any:
-        distance = self._locals.get(expr)
-        if distance is None:
+        location = self._locals.get(expr)
+        if location is None:
             return self.globals.get(name)
-        value = self._environment.get_at(distance, name.lexeme)
-        return value
+        distance, slot = location
+        if distance == GLOBAL:
+            return self.globals.get_at(slot, name)
+        return self._environment.get_at(distance, slot)
+
+    def _define(self, name: Token, value: Any) -> None:
+        if self._environment is self.globals:
+            self.globals.define(name.lexeme, value)
+        else:
+            self._environment.define(value)
 
     def _is_truthy(self, value: Any) -> bool:
         if value is None:
@@ -277,6 +527,8 @@ class Interpreter:
     def _stringify(self, value: Any) -> str:
         if value is None:
             return "nil"
+        if isinstance(value, (LoxList, LoxMap)):
+            return self._stringify_container(value)
         s = str(value)
         if isinstance(value, bool):
             return s.lower()
@@ -284,11 +536,60 @@ class Interpreter:
             return s[:-2]
         return s
 
+    def _stringify_container(self, value: LoxList | LoxMap) -> str:
+        parts: list[str] = []
+        active: set[int] = set()
+        stack: list[tuple[str, Any, int | None]] = [("", value, None)]
+        while stack:
+            text, item, closing = stack.pop()
+            parts.append(text)
+            if closing is not None:
+                active.discard(closing)
+            elif not isinstance(item, (LoxList, LoxMap)):
+                parts.append(self._stringify(item))
+            elif id(item) in active:
+                parts.append("[...]" if isinstance(item, LoxList) else "{...}")
+            elif isinstance(item, LoxList):
+                active.add(id(item))
+                parts.append("[")
+                stack.append(("]", None, id(item)))
+                for index in range(len(item.elements) - 1, -1, -1):
+                    stack.append((", " if index else "", item.elements[index], None))
+            else:
+                active.add(id(item))
+                parts.append("{")
+                stack.append(("}", None, id(item)))
+                entries = list(item.items())
+                for index in range(len(entries) - 1, -1, -1):
+                    key, entry = entries[index]
+                    stack.append((": ", entry, None))
+                    stack.append((", " if index else "", key, None))
+        return "".join(parts)
+
+    def _check_call(self, callee: LoxCallable, arguments: list[Any], paren: Token) -> None:
+        self._check_arity(callee, arguments, paren)
+        if self.call_depth >= self.max_depth:
+            runtime_error(paren, "Stack overflow.")
+
+    def _check_arity(self, callee: LoxCallable, arguments: list[Any], paren: Token) -> None:
+        self._call_line = paren.line
+        if len(arguments) != callee.arity:
+            runtime_error(
+                paren, "Expected {} arguments but got {}.".format(callee.arity, len(arguments))
+            )
+
     def _check_number_operand(self, operator: Token, right: Any) -> None:
         if isinstance(right, float):
             return
         runtime_error(operator, "Operand must be a number.")
 
+    def _check_increment_operand(self, operator: Token, value: Any) -> None:
+        if isinstance(value, float):
+            return
+        if operator.token_type == TokenType.PLUS:
+            runtime_error(operator, "Operands must be two numbers or two strings.")
+        runtime_error(operator, "Operands must be numbers.")
+
     def _check_number_operands(self, operator: Token, left: Any, right: Any) -> None:
         if isinstance(left, float) and isinstance(right, float):
             return
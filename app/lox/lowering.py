@@ -0,0 +1,83 @@
+from .expr import *
+from .optimizer import Optimizer
+from .stmt import *
+from .token import TokenType
+
+
+COMPARISONS = {
+    TokenType.BANG_EQUAL,
+    TokenType.EQUAL_EQUAL,
+    TokenType.GREATER,
+    TokenType.GREATER_EQUAL,
+    TokenType.LESS,
+    TokenType.LESS_EQUAL,
+}
+
+EQUALITIES = {TokenType.BANG_EQUAL, TokenType.EQUAL_EQUAL}
+
+INCREMENTS = {TokenType.MINUS, TokenType.PLUS}
+
+CONDITION_LOCATION = (0, 0)
+
+INCREMENT_LOCATION = (1, 0)
+
+
+class Lowerer(Optimizer):
+    def _optimize_block_stmt(self, stmt: BlockStmt) -> Stmt:
+        optimized = super()._optimize_block_stmt(stmt)
+        if not isinstance(optimized, BlockStmt) or len(optimized.statements) != 2:
+            return optimized
+        counter, loop = optimized.statements
+        if not isinstance(counter, VarStmt) or not isinstance(loop, WhileStmt):
+            return optimized
+        body = loop.body
+        if not isinstance(body, BlockStmt) or len(body.statements) != 2:
+            return optimized
+        statement, increment = body.statements
+        if isinstance(statement, (ClassStmt, FunctionStmt, VarStmt)) or not isinstance(increment, ExpressionStmt):
+            return optimized
+        assign = increment.expression
+        if not isinstance(assign, AssignExpr) or assign.name.lexeme != counter.name.lexeme:
+            return optimized
+        if self._interpreter.locals.get(assign) != INCREMENT_LOCATION:
+            return optimized
+
+        condition = self._lower_condition(loop.condition, counter.name.lexeme)
+        return BlockStmt([counter, ForStmt(condition, statement, self._lower_increment(assign))])
+
+    def _lower_condition(self, condition: Expr, name: str) -> Expr:
+        if not isinstance(condition, BinaryExpr) or condition.operator.token_type not in COMPARISONS:
+            return condition
+        variable, constant = condition.left, condition.right
+        if not isinstance(variable, VariableExpr) or variable.name.lexeme != name:
+            return condition
+        if not isinstance(constant, LiteralExpr):
+            return condition
+        if condition.operator.token_type not in EQUALITIES and not isinstance(constant.value, float):
+            return condition
+        if self._interpreter.locals.get(variable) != CONDITION_LOCATION:
+            return condition
+
+        lowered = CompareConstantExpr(variable.name, condition.operator, constant.value)
+        del self._interpreter.locals[variable]
+        self._interpreter.locals[lowered] = CONDITION_LOCATION
+        return lowered
+
+    def _lower_increment(self, assign: AssignExpr) -> Expr:
+        value = assign.value
+        if not isinstance(value, BinaryExpr) or value.operator.token_type not in INCREMENTS:
+            return assign
+        variable, constant = value.left, value.right
+        if not isinstance(variable, VariableExpr) or variable.name.lexeme != assign.name.lexeme:
+            return assign
+        if not isinstance(constant, LiteralExpr) or not isinstance(constant.value, float):
+            return assign
+        if self._interpreter.locals.get(variable) != INCREMENT_LOCATION:
+            return assign
+
+        delta = constant.value if value.operator.token_type == TokenType.PLUS else -constant.value
+        lowered = IncrementExpr(variable.name, value.operator, delta)
+        del self._interpreter.locals[assign]
+        del self._interpreter.locals[variable]
+        self._interpreter.locals[lowered] = INCREMENT_LOCATION
+        return lowered
@@ -1,6 +1,5 @@
 from __future__ import annotations
 import abc
-import time
 from typing import TYPE_CHECKING, Any
 
 if TYPE_CHECKING:
@@ -16,15 +15,3 @@ class LoxCallable(abc.ABC):
     @abc.abstractmethod
     def arity(self) -> int:
         raise NotImplementedError
-
-
-class LoxClock(LoxCallable):
-    def call(self, interpreter: Interpreter, arguments: list[Any]) -> Any:
-        return time.time()
-
-    @property
-    def arity(self) -> int:
-        return 0
-
-    def __str__(self) -> str:
-        return "<native fn>"
@@ -2,8 +2,10 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, Any
 
 from .error import runtime_error
+from .inline_cache import InlineCache
 from .lox_callable import LoxCallable
 from .lox_function import LoxFunction
+from .shape import Shape
 from .token import Token
 
 if TYPE_CHECKING:
@@ -14,46 +16,81 @@ class LoxClass(LoxCallable):
     def __init__(self, name: str, superclass: LoxClass | None, methods: dict[str, LoxFunction]) -> None:
         self.name = name
         self.superclass = superclass
-        self._methods = methods
+        self._methods = methods if superclass is None else superclass._methods | methods
+        self.initializer = self._methods.get("init")
+        self.root_shape = Shape()
 
     def call(self, interpreter: Interpreter, arguments: list[Any]) -> Any:
         instance = LoxInstance(self)
-        initializer = self.find_method("init")
-        if initializer is not None:
-            initializer.bind(instance).call(interpreter, arguments)
+        if self.initializer is not None:
+            self.initializer.call_method(interpreter, instance, arguments)
         return instance
 
-    def find_method(self, name: str) -> LoxFunction | None:
-        if (method := self._methods.get(name)) is not None:
-            return method
-        return None if self.superclass is None else self.superclass.find_method(name)
+    def find_method(self, name: str, cache: InlineCache | None = None) -> LoxFunction | None:
+        if cache is None:
+            return self._methods.get(name)
+        if cache.key is not self:
+            cache.key = self
+            cache.value = self._methods.get(name)
+        return cache.value
 
     @property
     def arity(self) -> int:
-        initializer = self.find_method("init")
-        return 0 if initializer is None else initializer.arity
+        return 0 if self.initializer is None else self.initializer.arity
 
     def __str__(self) -> str:
         return self.name
 
 
 class LoxInstance:
-    def __init__(self, klass: LoxClass) -> None:
-        self._klass = klass
-        self._fields: dict[str, Any] = {}
+    __slots__ = ("klass", "shape", "values")
 
-    def get(self, name: Token) -> Any:
-        if name.lexeme in self._fields:
-            return self._fields[name.lexeme]
+    def __init__(self, klass: LoxClass) -> None:
+        self.klass = klass
+        self.shape = klass.root_shape
+        self.values: list[Any] = []
 
-        method = self._klass.find_method(name.lexeme)
-        if method is not None:
-            return method.bind(self)
+    def get(self, name: Token, cache: InlineCache | None = None) -> Any:
+        member = self.find_member(name.lexeme, cache)
+        if type(member) is int:
+            return self.values[member]
+        if member is not None:
+            return member.bind(self)
 
         runtime_error(name, f"Undefined property '{name.lexeme}'.")
 
-    def set(self, name: Token, value: Any) -> None:
-        self._fields[name.lexeme] = value
+    def find_member(self, name: str, cache: InlineCache | None = None) -> int | LoxFunction | None:
+        shape = self.shape
+        if cache is not None and cache.key is shape:
+            return cache.value
+
+        member = shape.slots.get(name)
+        if member is None:
+            member = self.klass.find_method(name)
+        if cache is not None:
+            cache.key = shape
+            cache.value = member
+        return member
+
+    def set(self, name: Token, value: Any, cache: InlineCache | None = None) -> None:
+        shape = self.shape
+        if cache is not None and cache.key is shape:
+            target, slot = cache.value
+        else:
+            slot = shape.slots.get(name.lexeme)
+            if slot is None:
+                target, slot = shape.with_field(name.lexeme), len(shape.slots)
+            else:
+                target = shape
+            if cache is not None:
+                cache.key = shape
+                cache.value = target, slot
+
+        if target is shape:
+            self.values[slot] = value
+        else:
+            self.shape = target
+            self.values.append(value)
 
     def __str__(self) -> str:
-        return self._klass.name + " instance"
+        return self.klass.name + " instance"
@@ -1,9 +1,9 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING, Any
 
-from .environment import Environment
+from .environment import Environment, GlobalEnvironment
 from .lox_callable import LoxCallable
-from .return_exception import ReturnException
+from .return_value import ReturnValue, TailCall
 from .stmt import *
 
 if TYPE_CHECKING:
@@ -12,28 +12,37 @@ if TYPE_CHECKING:
 
 
 class LoxFunction(LoxCallable):
-    def __init__(self, declaration: FunctionStmt, closure: Environment, is_initializer: bool) -> None:
+    def __init__(
+        self, declaration: FunctionStmt, closure: Environment | GlobalEnvironment, is_initializer: bool
+    ) -> None:
         self._declaration = declaration
         self._closure = closure
         self._is_initializer = is_initializer
 
     def call(self, interpreter: Interpreter, arguments: list[Any]) -> Any:
-        environment = Environment(self._closure)
-        for parameter, argument in zip(self._declaration.params, arguments):
-            environment.define(parameter.lexeme, argument)
-
+        function = self
+        interpreter.call_depth += 1
         try:
-            interpreter.execute_block(self._declaration.body, environment)
-        except ReturnException as ex:
-            return self._closure.get_at(0, "this") if self._is_initializer else ex.value
+            completion = function._execute_body(interpreter, Environment(function._closure, arguments))
+            while type(completion) is TailCall:
+                function, arguments = completion.function, completion.arguments
+                completion = function._execute_body(interpreter, Environment(function._closure, arguments))
+        finally:
+            interpreter.call_depth -= 1
+        if function._is_initializer:
+            return arguments[0]
+        if completion is not None:
+            return completion.value
+
+    def call_method(self, interpreter: Interpreter, receiver: LoxInstance, arguments: list[Any]) -> Any:
+        arguments.insert(0, receiver)
+        return self.call(interpreter, arguments)
 
-        if self._is_initializer:
-            return self._closure.get_at(0, "this")
+    def bind(self, instance: LoxInstance) -> LoxBoundMethod:
+        return LoxBoundMethod(instance, self)
 
-    def bind(self, instance: LoxInstance) -> LoxFunction:
-        environment = Environment(self._closure)
-        environment.define("this", instance)
-        return LoxFunction(self._declaration, environment, self._is_initializer)
+    def _execute_body(self, interpreter: Interpreter, environment: Environment) -> ReturnValue | None:
+        return interpreter.execute_block(self._declaration.body, environment)
 
     @property
     def arity(self) -> int:
@@ -41,3 +50,19 @@ class LoxFunction(LoxCallable):
 
     def __str__(self) -> str:
         return f"<fn {self._declaration.name.lexeme}>"
+
+
+class LoxBoundMethod(LoxCallable):
+    def __init__(self, receiver: LoxInstance, method: LoxFunction) -> None:
+        self.receiver = receiver
+        self.method = method
+
+    def call(self, interpreter: Interpreter, arguments: list[Any]) -> Any:
+        return self.method.call_method(interpreter, self.receiver, arguments)
+
+    @property
+    def arity(self) -> int:
+        return self.method.arity
+
+    def __str__(self) -> str:
+        return str(self.method)
@@ -0,0 +1,54 @@
+from __future__ import annotations
+import functools
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any
+
+from .error import runtime_error
+from .natives import NativeError, NativeFunction, index
+from .token import Token
+
+if TYPE_CHECKING:
+    from .interpreter import Interpreter
+
+
+class LoxList:
+    __slots__ = ("elements",)
+
+    def __init__(self, elements: list[Any]) -> None:
+        self.elements = elements
+
+    def get(self, name: Token) -> NativeFunction:
+        method = METHODS.get(name.lexeme)
+        if method is None:
+            runtime_error(name, "Undefined property '" + name.lexeme + "'.")
+        arity, function = method
+        return NativeFunction(name.lexeme, arity, functools.partial(function, self))
+
+
+def _append(lox_list: LoxList, interpreter: Interpreter, value: Any) -> None:
+    lox_list.elements.append(value)
+
+
+def _pop(lox_list: LoxList, interpreter: Interpreter) -> Any:
+    if not lox_list.elements:
+        raise NativeError("Can't pop from an empty list.")
+    return lox_list.elements.pop()
+
+
+def _length(lox_list: LoxList, interpreter: Interpreter) -> float:
+    return float(len(lox_list.elements))
+
+
+def _slice(lox_list: LoxList, interpreter: Interpreter, start: Any, end: Any) -> LoxList:
+    start, end = index(start), index(end)
+    if not 0 <= start <= end <= len(lox_list.elements):
+        raise NativeError("Index out of range.")
+    return LoxList(lox_list.elements[start:end])
+
+
+METHODS: dict[str, tuple[int, Callable[..., Any]]] = {
+    "append": (1, _append),
+    "length": (0, _length),
+    "pop": (0, _pop),
+    "slice": (2, _slice),
+}
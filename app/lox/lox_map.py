@@ -0,0 +1,91 @@
+from __future__ import annotations
+import functools
+from collections.abc import Callable, Iterator
+from typing import TYPE_CHECKING, Any
+
+from .error import runtime_error
+from .lox_list import LoxList
+from .natives import NativeFunction
+from .token import Token
+
+if TYPE_CHECKING:
+    from .interpreter import Interpreter
+
+
+TRUE_KEY = object()
+
+FALSE_KEY = object()
+
+
+class LoxMap:
+    __slots__ = ("entries",)
+
+    def __init__(self) -> None:
+        self.entries: dict[Any, Any] = {}
+
+    def get(self, name: Token) -> NativeFunction:
+        method = METHODS.get(name.lexeme)
+        if method is None:
+            runtime_error(name, "Undefined property '" + name.lexeme + "'.")
+        arity, function = method
+        return NativeFunction(name.lexeme, arity, functools.partial(function, self))
+
+    def get_item(self, key: Any) -> Any:
+        return self.entries.get(_key(key))
+
+    def set_item(self, key: Any, value: Any) -> None:
+        self.entries[_key(key)] = value
+
+    def items(self) -> Iterator[tuple[Any, Any]]:
+        for key, value in self.entries.items():
+            yield _value(key), value
+
+
+def _key(value: Any) -> Any:
+    if value is True:
+        return TRUE_KEY
+    if value is False:
+        return FALSE_KEY
+    return value
+
+
+def _value(key: Any) -> Any:
+    if key is TRUE_KEY:
+        return True
+    if key is FALSE_KEY:
+        return False
+    return key
+
+
+def _get(lox_map: LoxMap, interpreter: Interpreter, key: Any) -> Any:
+    return lox_map.get_item(key)
+
+
+def _set(lox_map: LoxMap, interpreter: Interpreter, key: Any, value: Any) -> None:
+    lox_map.set_item(key, value)
+
+
+def _has(lox_map: LoxMap, interpreter: Interpreter, key: Any) -> bool:
+    return _key(key) in lox_map.entries
+
+
+def _delete(lox_map: LoxMap, interpreter: Interpreter, key: Any) -> bool:
+    return lox_map.entries.pop(_key(key), lox_map) is not lox_map
+
+
+def _keys(lox_map: LoxMap, interpreter: Interpreter) -> LoxList:
+    return LoxList([_value(key) for key in lox_map.entries])
+
+
+def _size(lox_map: LoxMap, interpreter: Interpreter) -> float:
+    return float(len(lox_map.entries))
+
+
+METHODS: dict[str, tuple[int, Callable[..., Any]]] = {
+    "delete": (1, _delete),
+    "get": (1, _get),
+    "has": (1, _has),
+    "keys": (0, _keys),
+    "set": (2, _set),
+    "size": (0, _size),
+}
@@ -0,0 +1,87 @@
+from __future__ import annotations
+from collections.abc import Callable, Iterator
+from typing import TYPE_CHECKING, Any
+
+from .environment import GlobalEnvironment
+from .lox_callable import LoxCallable
+from .rope import Rope
+
+if TYPE_CHECKING:
+    from .interpreter import Interpreter
+
+
+type NativeImpl = Callable[..., Any]
+
+
+class NativeError(Exception):
+    def __init__(self, message: str) -> None:
+        super().__init__(message)
+        self.message = message
+
+
+class NativeFunction(LoxCallable):
+    def __init__(self, name: str, arity: int, function: NativeImpl) -> None:
+        self.name = name
+        self._arity = arity
+        self._function = function
+
+    def call(self, interpreter: Interpreter, arguments: list[Any]) -> Any:
+        return self._function(interpreter, *arguments)
+
+    @property
+    def arity(self) -> int:
+        return self._arity
+
+    def __str__(self) -> str:
+        return "<native fn>"
+
+
+class Natives:
+    def __init__(self) -> None:
+        self._functions: dict[str, NativeFunction] = {}
+
+    def register(self, name: str, arity: int, function: NativeImpl) -> None:
+        self._functions[name] = NativeFunction(name, arity, function)
+
+    def native(self, name: str, arity: int) -> Callable[[NativeImpl], NativeImpl]:
+        def decorator(function: NativeImpl) -> NativeImpl:
+            self.register(name, arity, function)
+            return function
+
+        return decorator
+
+    def update(self, other: Natives) -> None:
+        self._functions.update(other._functions)
+
+    def install(self, globals: GlobalEnvironment) -> None:
+        for name, function in self._functions.items():
+            globals.define(name, function)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._functions
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._functions)
+
+    def __len__(self) -> int:
+        return len(self._functions)
+
+
+def number(value: Any) -> float:
+    if isinstance(value, float):
+        return value
+    raise NativeError("Argument must be a number.")
+
+
+def string(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, Rope):
+        return str(value)
+    raise NativeError("Argument must be a string.")
+
+
+def index(value: Any) -> int:
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    raise NativeError("Index must be an integer.")
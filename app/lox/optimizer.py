@@ -0,0 +1,262 @@
+from collections.abc import Sequence
+from typing import Any
+
+from .error import LoxRuntimeError
+from .expr import *
+from .interpreter import Interpreter
+from .rope import Rope
+from .stmt import *
+from .token import TokenType
+
+
+class Optimizer:
+    def __init__(self, interpreter: Interpreter) -> None:
+        self._interpreter = interpreter
+
+    def optimize(self, statements: Sequence[Stmt]) -> Sequence[Stmt]:
+        original = list(statements)
+        optimized = self._optimize_sequence(original)
+        return statements if self._unchanged(optimized, original) else optimized
+
+    def _optimize_sequence(self, statements: list[Stmt]) -> list[Stmt]:
+        optimized = []
+        for stmt in statements:
+            stmt = self._optimize(stmt)
+            if stmt is None:
+                continue
+            optimized.append(stmt)
+            if isinstance(stmt, ReturnStmt):
+                break
+        return optimized
+
+    def _optimize(self, stmt: Stmt) -> Stmt | None:
+        if isinstance(stmt, BlockStmt):
+            return self._optimize_block_stmt(stmt)
+        if isinstance(stmt, ClassStmt):
+            return self._optimize_class_stmt(stmt)
+        if isinstance(stmt, ExpressionStmt):
+            return self._optimize_expression_stmt(stmt)
+        if isinstance(stmt, FunctionStmt):
+            return self._optimize_function_stmt(stmt)
+        if isinstance(stmt, IfStmt):
+            return self._optimize_if_stmt(stmt)
+        if isinstance(stmt, PrintStmt):
+            return self._optimize_print_stmt(stmt)
+        if isinstance(stmt, ReturnStmt):
+            return self._optimize_return_stmt(stmt)
+        if isinstance(stmt, VarStmt):
+            return self._optimize_var_stmt(stmt)
+        if isinstance(stmt, WhileStmt):
+            return self._optimize_while_stmt(stmt)
+        return stmt
+
+    def _optimize_block_stmt(self, stmt: BlockStmt) -> Stmt:
+        original = list(stmt.statements)
+        statements = self._optimize_sequence(original)
+        if self._unchanged(statements, original):
+            return stmt
+        return BlockStmt(statements)
+
+    def _optimize_class_stmt(self, stmt: ClassStmt) -> Stmt:
+        original = list(stmt.methods)
+        methods = [self._optimize_function_stmt(method) for method in original]
+        if self._unchanged(methods, original):
+            return stmt
+        return ClassStmt(stmt.name, stmt.superclass, methods)
+
+    def _optimize_expression_stmt(self, stmt: ExpressionStmt) -> Stmt | None:
+        original = stmt.expression
+        expression = self._optimize_expr(original)
+        if isinstance(expression, LiteralExpr):
+            return None
+        if expression is original:
+            return stmt
+        return ExpressionStmt(expression)
+
+    def _optimize_function_stmt(self, stmt: FunctionStmt) -> FunctionStmt:
+        original = list(stmt.body)
+        body = self._optimize_sequence(original)
+        if self._unchanged(body, original):
+            return stmt
+        return FunctionStmt(stmt.name, stmt.params, body)
+
+    def _optimize_if_stmt(self, stmt: IfStmt) -> Stmt | None:
+        original = (stmt.condition, stmt.then_branch, stmt.else_branch)
+        condition = self._optimize_expr(original[0])
+        then_branch = self._optimize_branch(original[1])
+        else_branch = None if original[2] is None else self._optimize_branch(original[2])
+        if isinstance(condition, LiteralExpr):
+            return then_branch if self._interpreter.is_truthy(condition.value) else else_branch
+        if self._unchanged([condition, then_branch, else_branch], original):
+            return stmt
+        return IfStmt(condition, then_branch, else_branch)
+
+    def _optimize_print_stmt(self, stmt: PrintStmt) -> Stmt:
+        original = stmt.expression
+        expression = self._optimize_expr(original)
+        if expression is original:
+            return stmt
+        return PrintStmt(expression)
+
+    def _optimize_return_stmt(self, stmt: ReturnStmt) -> Stmt:
+        original = stmt.value
+        if original is None:
+            return stmt
+        value = self._optimize_expr(original)
+        if value is original:
+            return stmt
+        return ReturnStmt(stmt.keyword, value)
+
+    def _optimize_var_stmt(self, stmt: VarStmt) -> Stmt:
+        original = stmt.initializer
+        if original is None:
+            return stmt
+        initializer = self._optimize_expr(original)
+        if initializer is original:
+            return stmt
+        return VarStmt(stmt.name, initializer)
+
+    def _optimize_while_stmt(self, stmt: WhileStmt) -> Stmt | None:
+        original = (stmt.condition, stmt.body)
+        condition = self._optimize_expr(original[0])
+        if isinstance(condition, LiteralExpr) and not self._interpreter.is_truthy(condition.value):
+            return None
+        body = self._optimize_branch(original[1])
+        if self._unchanged([condition, body], original):
+            return stmt
+        return WhileStmt(condition, body)
+
+    def _optimize_branch(self, stmt: Stmt) -> Stmt:
+        optimized = self._optimize(stmt)
+        return BlockStmt([]) if optimized is None else optimized
+
+    def _optimize_expr(self, expr: Expr) -> Expr:
+        if isinstance(expr, AssignExpr):
+            return self._optimize_assign_expr(expr)
+        if isinstance(expr, BinaryExpr):
+            return self._optimize_binary_expr(expr)
+        if isinstance(expr, CallExpr):
+            return self._optimize_call_expr(expr)
+        if isinstance(expr, GetExpr):
+            return self._optimize_get_expr(expr)
+        if isinstance(expr, GroupingExpr):
+            return self._optimize_grouping_expr(expr)
+        if isinstance(expr, IndexExpr):
+            return self._optimize_index_expr(expr)
+        if isinstance(expr, IndexSetExpr):
+            return self._optimize_index_set_expr(expr)
+        if isinstance(expr, ListExpr):
+            return self._optimize_list_expr(expr)
+        if isinstance(expr, LogicalExpr):
+            return self._optimize_logical_expr(expr)
+        if isinstance(expr, SetExpr):
+            return self._optimize_set_expr(expr)
+        if isinstance(expr, UnaryExpr):
+            return self._optimize_unary_expr(expr)
+        return expr
+
+    def _optimize_assign_expr(self, expr: AssignExpr) -> Expr:
+        original = expr.value
+        value = self._optimize_expr(original)
+        if value is original:
+            return expr
+        optimized = AssignExpr(expr.name, value)
+        location = self._interpreter.locals.get(expr)
+        if location is not None:
+            del self._interpreter.locals[expr]
+            self._interpreter.locals[optimized] = location
+        return optimized
+
+    def _optimize_binary_expr(self, expr: BinaryExpr) -> Expr:
+        original = (expr.left, expr.right)
+        left, right = self._optimize_expr(original[0]), self._optimize_expr(original[1])
+        if not self._unchanged([left, right], original):
+            expr = BinaryExpr(left, expr.operator, right)
+        if isinstance(left, LiteralExpr) and isinstance(right, LiteralExpr):
+            return self._fold(expr)
+        return expr
+
+    def _optimize_call_expr(self, expr: CallExpr) -> Expr:
+        original = [expr.callee, *expr.arguments]
+        optimized = [self._optimize_expr(node) for node in original]
+        if self._unchanged(optimized, original):
+            return expr
+        call = CallExpr(optimized[0], expr.paren, optimized[1:])
+        if expr in self._interpreter.tail_calls:
+            self._interpreter.tail_calls.discard(expr)
+            self._interpreter.resolve_tail_call(call)
+        return call
+
+    def _optimize_get_expr(self, expr: GetExpr) -> Expr:
+        original = expr.obj
+        obj = self._optimize_expr(original)
+        if obj is original:
+            return expr
+        return GetExpr(obj, expr.name)
+
+    def _optimize_grouping_expr(self, expr: GroupingExpr) -> Expr:
+        original = expr.expression
+        expression = self._optimize_expr(original)
+        if isinstance(expression, LiteralExpr):
+            return expression
+        if expression is original:
+            return expr
+        return GroupingExpr(expression)
+
+    def _optimize_index_expr(self, expr: IndexExpr) -> Expr:
+        original = (expr.obj, expr.index)
+        obj, index = self._optimize_expr(original[0]), self._optimize_expr(original[1])
+        if self._unchanged([obj, index], original):
+            return expr
+        return IndexExpr(obj, expr.bracket, index)
+
+    def _optimize_index_set_expr(self, expr: IndexSetExpr) -> Expr:
+        original = (expr.obj, expr.index, expr.value)
+        obj, index, value = (self._optimize_expr(node) for node in original)
+        if self._unchanged([obj, index, value], original):
+            return expr
+        return IndexSetExpr(obj, expr.bracket, index, value)
+
+    def _optimize_list_expr(self, expr: ListExpr) -> Expr:
+        original = list(expr.elements)
+        elements = [self._optimize_expr(element) for element in original]
+        if self._unchanged(elements, original):
+            return expr
+        return ListExpr(expr.bracket, elements)
+
+    def _optimize_logical_expr(self, expr: LogicalExpr) -> Expr:
+        original = (expr.left, expr.right)
+        left, right = self._optimize_expr(original[0]), self._optimize_expr(original[1])
+        if isinstance(left, LiteralExpr):
+            if self._interpreter.is_truthy(left.value) == (expr.operator.token_type == TokenType.OR):
+                return left
+            return right
+        if self._unchanged([left, right], original):
+            return expr
+        return LogicalExpr(left, expr.operator, right)
+
+    def _optimize_set_expr(self, expr: SetExpr) -> Expr:
+        original = (expr.obj, expr.value)
+        obj, value = self._optimize_expr(original[0]), self._optimize_expr(original[1])
+        if self._unchanged([obj, value], original):
+            return expr
+        return SetExpr(obj, expr.name, value)
+
+    def _optimize_unary_expr(self, expr: UnaryExpr) -> Expr:
+        original = expr.right
+        right = self._optimize_expr(original)
+        if right is not original:
+            expr = UnaryExpr(expr.operator, right)
+        if isinstance(right, LiteralExpr):
+            return self._fold(expr)
+        return expr
+
+    def _fold(self, expr: Expr) -> Expr:
+        try:
+            value: Any = self._interpreter.evaluate(expr)
+        except (LoxRuntimeError, ArithmeticError):
+            return expr
+        return LiteralExpr(str(value) if isinstance(value, Rope) else value)
+
+    def _unchanged(self, optimized: list[Any], original: Sequence[Any]) -> bool:
+        return len(optimized) == len(original) and all(a is b for a, b in zip(optimized, original))
@@ -0,0 +1,41 @@
+import enum
+import sys
+from typing import TextIO
+
+
+BufferMode = enum.Enum("BufferMode", ["FULL", "LINE", "NONE"])
+
+DEFAULT_BUFFER_SIZE = 8192
+
+
+class Output:
+    def __init__(
+        self, stream: TextIO | None = None, buffer_size: int = DEFAULT_BUFFER_SIZE, mode: BufferMode | None = None
+    ) -> None:
+        self._stream = sys.stdout if stream is None else stream
+        if mode is None:
+            mode = BufferMode.LINE if self._stream.isatty() else BufferMode.FULL
+        self.mode = mode
+        self._buffer_size = buffer_size
+        self._parts: list[str] = []
+        self._size = 0
+
+    def write(self, text: str) -> None:
+        if self.mode is BufferMode.NONE:
+            self._stream.write(text)
+            self._stream.flush()
+            return
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self._buffer_size or (self.mode is BufferMode.LINE and "\n" in text):
+            self.flush()
+
+    def write_line(self, text: str) -> None:
+        self.write(text + "\n")
+
+    def flush(self) -> None:
+        if self._parts:
+            self._stream.write("".join(self._parts))
+            self._parts.clear()
+            self._size = 0
+        self._stream.flush()
@@ -1,26 +1,41 @@
+from collections.abc import Iterator
+
 from .error import error
 from .expr import *
+from .scanner import CHUNK_SIZE, Scanner
 from .stmt import *
 from .token import Token, TokenType
+from .token_buffer import TokenBuffer
 
 
 class ParseError(Exception):
-    pass
+    def __init__(self, token: Token, message: str) -> None:
+        super().__init__(message)
+        self.token = token
+        self.message = message
+
+    def report(self) -> None:
+        error(self.token, self.message)
 
 
 class Parser:
-    def __init__(self, tokens: list[Token]) -> None:
+    def __init__(self, tokens: TokenBuffer, scanner: Scanner | None = None) -> None:
         self._tokens = tokens
+        self._types = tokens.types
+        self._scanner = scanner
         self._current = 0
+        if scanner is not None:
+            scanner.scan_into(tokens, CHUNK_SIZE)
 
     def parse_to_expr(self) -> Expr:
         return self._expression()
 
     def parse_to_stmts(self) -> list[Stmt]:
-        statements = []
+        return list(self.declarations())
+
+    def declarations(self) -> Iterator[Stmt]:
         while not self._is_at_end():
-            statements.append(self._declaration())
-        return statements
+            yield self._declaration()
 
     def _declaration(self) -> Stmt:
         if self._match(TokenType.CLASS):
@@ -181,6 +196,8 @@ class Parser:
                 return AssignExpr(expr.name, value)
             elif isinstance(expr, GetExpr):
                 return SetExpr(expr.obj, expr.name, value)
+            elif isinstance(expr, IndexExpr):
+                return IndexSetExpr(expr.obj, expr.bracket, expr.index, value)
 
             raise self._error(equals, "Invalid assignment target.")
 
@@ -237,6 +254,10 @@ class Parser:
             elif self._match(TokenType.DOT):
                 name = self._consume(TokenType.IDENTIFIER, "Expect property name after '.'.")
                 expr = GetExpr(expr, name)
+            elif self._match(TokenType.LEFT_BRACKET):
+                index = self._expression()
+                bracket = self._consume(TokenType.RIGHT_BRACKET, "Expect ']' after index.")
+                expr = IndexExpr(expr, bracket, index)
             else:
                 break
 
@@ -257,6 +278,19 @@ class Parser:
 
         return CallExpr(callee, paren, arguments)
 
+    def _finish_list(self) -> ListExpr:
+        bracket = self._previous()
+        elements = []
+        if not self._check(TokenType.RIGHT_BRACKET):
+            while True:
+                elements.append(self._expression())
+                if not self._match(TokenType.COMMA):
+                    break
+
+        self._consume(TokenType.RIGHT_BRACKET, "Expect ']' after list elements.")
+
+        return ListExpr(bracket, elements)
+
     def _primary(self) -> Expr:
         if self._match(TokenType.FALSE):
             return LiteralExpr(False)
@@ -285,6 +319,9 @@ class Parser:
             self._consume(TokenType.RIGHT_PAREN, "Expect ')' after expression.")
             return GroupingExpr(expr)
 
+        if self._match(TokenType.LEFT_BRACKET):
+            return self._finish_list()
+
         raise self._error(self._peek(), "Expect expression.")
 
     def _match(self, *token_types: TokenType) -> bool:
@@ -295,27 +332,31 @@ class Parser:
         return False
 
     def _check(self, token_type: TokenType) -> bool:
-        return False if self._is_at_end() else self._peek().token_type == token_type
+        return self._types[self._current] == token_type.value
 
     def _is_at_end(self) -> bool:
-        return self._peek().token_type == TokenType.EOF
+        return self._types[self._current] == TokenType.EOF.value
 
     def _peek(self) -> Token:
-        return self._tokens[self._current]
+        return self._tokens.token(self._current)
 
-    def _advance(self) -> Token:
-        if not self._is_at_end():
-            self._current += 1
-        return self._previous()
+    def _advance(self) -> None:
+        if self._is_at_end():
+            return
+        self._current += 1
+        if self._current == len(self._types):
+            self._tokens.discard_before(self._current - 1)
+            self._current = 1
+            self._scanner.scan_into(self._tokens, CHUNK_SIZE)
 
     def _previous(self) -> Token:
-        return self._tokens[self._current - 1]
+        return self._tokens.token(self._current - 1)
 
     def _consume(self, token_type: TokenType, error_message: str) -> Token:
         if self._check(token_type):
-            return self._advance()
+            self._advance()
+            return self._previous()
         raise self._error(self._peek(), error_message)
 
     def _error(self, token: Token, message: str) -> ParseError:
-        error(token, message)
-        return ParseError()
+        return ParseError(token, message)
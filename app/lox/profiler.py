@@ -0,0 +1,177 @@
+import dataclasses
+import time
+from collections.abc import Sequence
+from typing import Any
+
+from .environment import Environment, GlobalEnvironment
+from .expr import Expr
+from .interpreter import DEFAULT_MAX_DEPTH, Interpreter
+from .lox_function import LoxFunction
+from .natives import Natives
+from .output import Output
+from .return_value import ReturnValue
+from .stmt import *
+from .token import Token
+
+
+@dataclasses.dataclass(eq=False)
+class FunctionStats:
+    name: str
+    line: int
+    calls: int = 0
+    self_time: float = 0.0
+    cumulative_time: float = 0.0
+    active: int = dataclasses.field(default=0, repr=False)
+
+
+@dataclasses.dataclass(eq=False)
+class LineStats:
+    line: int
+    hits: int = 0
+    time: float = 0.0
+
+
+class ProfiledFunction(LoxFunction):
+    def __init__(
+        self,
+        declaration: FunctionStmt,
+        closure: Environment | GlobalEnvironment,
+        is_initializer: bool,
+        profiler: "ProfilingInterpreter",
+    ) -> None:
+        super().__init__(declaration, closure, is_initializer)
+        self._profiler = profiler
+        self._stats = profiler.function_stats(declaration)
+
+    def _execute_body(self, interpreter: Interpreter, environment: Environment) -> ReturnValue | None:
+        stats = self._stats
+        nested = self._profiler.nested_calls
+        stats.calls += 1
+        stats.active += 1
+        nested.append(0.0)
+        start = time.perf_counter()
+        try:
+            return super()._execute_body(interpreter, environment)
+        finally:
+            elapsed = time.perf_counter() - start
+            stats.self_time += elapsed - nested.pop()
+            stats.active -= 1
+            if stats.active == 0:
+                stats.cumulative_time += elapsed
+            nested[-1] += elapsed
+
+
+class ProfilingInterpreter(Interpreter):
+    def __init__(
+        self, output: Output | None = None, max_depth: int = DEFAULT_MAX_DEPTH, natives: Natives | None = None
+    ) -> None:
+        super().__init__(output, max_depth, natives)
+        self.total_time = 0.0
+        self._functions: dict[int, FunctionStats] = {}
+        self._statements: dict[int, LineStats] = {}
+        self._lines: dict[int, LineStats] = {}
+        self._nested_statements = [0.0]
+        self.nested_calls = [0.0]
+
+    def function_stats(self, declaration: FunctionStmt) -> FunctionStats:
+        stats = self._functions.get(id(declaration))
+        if stats is None:
+            stats = self._functions[id(declaration)] = FunctionStats(declaration.name.lexeme, declaration.name.line)
+        return stats
+
+    def report(self) -> dict[str, Any]:
+        functions = sorted(
+            (stats for stats in self._functions.values() if stats.calls),
+            key=lambda stats: stats.self_time,
+            reverse=True,
+        )
+        lines = sorted(
+            (stats for stats in self._lines.values() if stats.hits),
+            key=lambda stats: stats.time,
+            reverse=True,
+        )
+        return {
+            "total_time": self.total_time,
+            "functions": [
+                {
+                    "name": stats.name,
+                    "line": stats.line,
+                    "calls": stats.calls,
+                    "self_time": stats.self_time,
+                    "cumulative_time": stats.cumulative_time,
+                }
+                for stats in functions
+            ],
+            "lines": [dataclasses.asdict(stats) for stats in lines],
+        }
+
+    def _execute_program(self, stmts: list[Stmt]) -> None:
+        self._index(stmts, None, 1)
+        start = time.perf_counter()
+        try:
+            super()._execute_program(stmts)
+        finally:
+            self.total_time += time.perf_counter() - start
+
+    def _execute(self, stmt: Stmt) -> ReturnValue | None:
+        stats = self._statements[id(stmt)]
+        nested = self._nested_statements
+        nested.append(0.0)
+        start = time.perf_counter()
+        try:
+            return super()._execute(stmt)
+        finally:
+            elapsed = time.perf_counter() - start
+            stats.hits += 1
+            stats.time += elapsed - nested.pop()
+            nested[-1] += elapsed
+
+    def _make_function(
+        self, declaration: FunctionStmt, closure: Environment | GlobalEnvironment, is_initializer: bool
+    ) -> LoxFunction:
+        return ProfiledFunction(declaration, closure, is_initializer, self)
+
+    def _index(self, stmts: Sequence[Stmt], class_name: str | None, line: int) -> int:
+        for stmt in stmts:
+            line = self._index_stmt(stmt, class_name, line)
+        return line
+
+    def _index_stmt(self, stmt: Stmt, class_name: str | None, line: int) -> int:
+        line = self._first_line(stmt) or line
+        stats = self._lines.get(line)
+        if stats is None:
+            stats = self._lines[line] = LineStats(line)
+        self._statements[id(stmt)] = stats
+
+        if isinstance(stmt, BlockStmt):
+            return self._index(stmt.statements, class_name, line)
+        if isinstance(stmt, ClassStmt):
+            for method in stmt.methods:
+                self._index_stmt(method, stmt.name.lexeme, line)
+        elif isinstance(stmt, ForStmt):
+            self._index_stmt(stmt.body, class_name, line)
+        elif isinstance(stmt, FunctionStmt):
+            function = self.function_stats(stmt)
+            if class_name is not None:
+                function.name = f"{class_name}.{stmt.name.lexeme}"
+            self._index(stmt.body, None, line)
+        elif isinstance(stmt, IfStmt):
+            self._index_stmt(stmt.then_branch, class_name, line)
+            if stmt.else_branch is not None:
+                self._index_stmt(stmt.else_branch, class_name, line)
+        elif isinstance(stmt, WhileStmt):
+            self._index_stmt(stmt.body, class_name, line)
+        return line
+
+    def _first_line(self, node: Any) -> int | None:
+        if isinstance(node, Token):
+            return node.line
+        if isinstance(node, list):
+            for item in node:
+                if (line := self._first_line(item)) is not None:
+                    return line
+        elif isinstance(node, (Expr, Stmt)):
+            for field in dataclasses.fields(node):
+                if (line := self._first_line(getattr(node, field.name))) is not None:
+                    return line
+        return None
@@ -0,0 +1,102 @@
+import contextlib
+import dataclasses
+import functools
+import gc
+import hashlib
+import os
+import pathlib
+import pickle
+import sys
+import tempfile
+from collections.abc import Mapping, Sequence
+
+from .expr import Expr
+from .stmt import Stmt
+
+
+HEADER = "loxc"
+
+
+@dataclasses.dataclass(eq=False)
+class Program:
+    stmts: Sequence[Stmt]
+    locals: Mapping[Expr, tuple[int, int]]
+    globals: list[str]
+    tail_calls: set[Expr]
+
+
+@functools.cache
+def interpreter_version() -> str:
+    digest = hashlib.sha256(sys.version.encode())
+    for path in sorted(pathlib.Path(__file__).parent.glob("*.py")):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def default_cache_directory() -> pathlib.Path:
+    if (directory := os.environ.get("LOX_CACHE_DIR")) is not None:
+        return pathlib.Path(directory)
+    cache_home = os.environ.get("XDG_CACHE_HOME") or pathlib.Path.home() / ".cache"
+    return pathlib.Path(cache_home) / "lox"
+
+
+class ProgramCache:
+    def __init__(self, directory: str | os.PathLike[str] | None = None, pipeline: Sequence[str] = ()) -> None:
+        self._directory = default_cache_directory() if directory is None else pathlib.Path(directory)
+        self._pipeline = tuple(pipeline)
+
+    def load(self, source: str, globals: Sequence[str] = ()) -> Program | None:
+        key = self._key(source)
+        path = self._path(key)
+        header = self._header(key)
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with open(path, mode="rb") as file:
+                if file.read(len(header)) != header:
+                    return None
+                program = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            with contextlib.suppress(OSError):
+                path.unlink(missing_ok=True)
+            return None
+        finally:
+            if enabled:
+                gc.enable()
+        if not isinstance(program, Program) or program.globals[: len(globals)] != list(globals):
+            return None
+        return program
+
+    def store(self, source: str, program: Program) -> None:
+        key = self._key(source)
+        try:
+            data = self._header(key) + pickle.dumps(program, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, RecursionError):
+            return
+
+        temporary = None
+        try:
+            self._directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+            fd, temporary = tempfile.mkstemp(dir=self._directory, suffix=".tmp")
+            with os.fdopen(fd, mode="wb") as file:
+                file.write(data)
+            os.replace(temporary, self._path(key))
+        except OSError:
+            if temporary is not None:
+                pathlib.Path(temporary).unlink(missing_ok=True)
+
+    def _key(self, source: str) -> str:
+        digest = hashlib.sha256(interpreter_version().encode())
+        digest.update("\0".join(self._pipeline).encode())
+        digest.update(b"\0")
+        digest.update(source.encode())
+        return digest.hexdigest()
+
+    def _header(self, key: str) -> bytes:
+        return f"{HEADER} {key}\n".encode()
+
+    def _path(self, key: str) -> pathlib.Path:
+        return self._directory / f"{key}.loxc"
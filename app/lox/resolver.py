@@ -1,5 +1,7 @@
+import dataclasses
 import enum
 
+from .environment import GLOBAL
 from .error import error
 from .expr import *
 from .interpreter import Interpreter
@@ -15,10 +17,16 @@ class ResolveError(Exception):
     pass
 
 
+@dataclasses.dataclass(eq=False)
+class Local:
+    slot: int
+    is_defined: bool = False
+
+
 class Resolver:
     def __init__(self, interpreter: Interpreter) -> None:
         self._interpreter = interpreter
-        self._scopes: list[dict[str, bool]] = []
+        self._scopes: list[dict[str, Local]] = []
         self._current_class = ClassType.NONE
         self._current_function = FunctionType.NONE
 
@@ -37,6 +45,12 @@ class Resolver:
             return self._resolve_get_expr(node)
         if isinstance(node, GroupingExpr):
             return self._resolve_grouping_expr(node)
+        if isinstance(node, IndexExpr):
+            return self._resolve_index_expr(node)
+        if isinstance(node, IndexSetExpr):
+            return self._resolve_index_set_expr(node)
+        if isinstance(node, ListExpr):
+            return self._resolve_list_expr(node)
         if isinstance(node, LogicalExpr):
             return self._resolve_logical_expr(node)
         if isinstance(node, SetExpr):
@@ -88,6 +102,19 @@ class Resolver:
     def _resolve_grouping_expr(self, expr: GroupingExpr) -> None:
         self._resolve(expr.expression)
 
+    def _resolve_index_expr(self, expr: IndexExpr) -> None:
+        self._resolve(expr.obj)
+        self._resolve(expr.index)
+
+    def _resolve_index_set_expr(self, expr: IndexSetExpr) -> None:
+        self._resolve(expr.obj)
+        self._resolve(expr.index)
+        self._resolve(expr.value)
+
+    def _resolve_list_expr(self, expr: ListExpr) -> None:
+        for element in expr.elements:
+            self._resolve(element)
+
     def _resolve_logical_expr(self, expr: LogicalExpr) -> None:
         self._resolve(expr.left)
         self._resolve(expr.right)
@@ -112,7 +139,8 @@ class Resolver:
         self._resolve(expr.right)
 
     def _resolve_variable_expr(self, expr: VariableExpr) -> None:
-        if self._scopes and self._scopes[-1].get(expr.name.lexeme) == False:
+        local = self._scopes[-1].get(expr.name.lexeme) if self._scopes else None
+        if local is not None and not local.is_defined:
             raise self._error(expr.name, "Can't read local variable in its own initializer.")
         self._resolve_local(expr, expr.name)
 
@@ -134,17 +162,12 @@ class Resolver:
             self._current_class = ClassType.SUBCLASS
             self._resolve(stmt.superclass)
             self._begin_scope()
-            self._scopes[-1]["super"] = True
-
-        self._begin_scope()
-        self._scopes[-1]["this"] = True
+            self._scopes[-1]["super"] = Local(slot=0, is_defined=True)
 
         for method in stmt.methods:
             function_type = FunctionType.INITIALIZER if method.name.lexeme == "init" else FunctionType.METHOD
             self._resolve_function(method, function_type)
 
-        self._end_scope()
-
         if stmt.superclass is not None:
             self._end_scope()
 
@@ -174,6 +197,8 @@ class Resolver:
             if self._current_function == FunctionType.INITIALIZER:
                 raise self._error(stmt.keyword, "Can't return a value from an initializer.")
             self._resolve(stmt.value)
+            if isinstance(stmt.value, CallExpr):
+                self._interpreter.resolve_tail_call(stmt.value)
 
     def _resolve_var_stmt(self, stmt: VarStmt) -> None:
         self._declare(stmt.name)
@@ -187,15 +212,18 @@ class Resolver:
 
     def _resolve_local(self, expr: Expr, name: Token) -> None:
         for i, scope in enumerate(reversed(self._scopes)):
-            if name.lexeme in scope:
-                self._interpreter.resolve(expr, depth=i)
+            if (local := scope.get(name.lexeme)) is not None:
+                self._interpreter.resolve(expr, depth=i, slot=local.slot)
                 return
+        self._interpreter.resolve(expr, depth=GLOBAL, slot=self._interpreter.globals.slot(name.lexeme))
 
     def _resolve_function(self, function: FunctionStmt, function_type: FunctionType) -> None:
         enclosing_function = self._current_function
         self._current_function = function_type
 
         self._begin_scope()
+        if function_type in (FunctionType.INITIALIZER, FunctionType.METHOD):
+            self._scopes[-1]["this"] = Local(slot=0, is_defined=True)
         for param in function.params:
             self._declare(param)
             self._define(param)
@@ -216,11 +244,11 @@ class Resolver:
         scope = self._scopes[-1]
         if name.lexeme in scope:
             raise self._error(name, "Already a variable with this name in this scope.")
-        scope[name.lexeme] = False
+        scope[name.lexeme] = Local(slot=len(scope))
 
     def _define(self, name: Token) -> None:
         if self._scopes:
-            self._scopes[-1][name.lexeme] = True
+            self._scopes[-1][name.lexeme].is_defined = True
 
     def _error(self, name: Token, message: str) -> ResolveError:
         error(name, message)
@@ -0,0 +1,20 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .lox_function import LoxFunction
+
+
+class ReturnValue:
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+
+class TailCall:
+    __slots__ = ("function", "arguments")
+
+    def __init__(self, function: LoxFunction, arguments: list[Any]) -> None:
+        self.function = function
+        self.arguments = arguments
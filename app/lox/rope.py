@@ -0,0 +1,43 @@
+ROPE_THRESHOLD = 1024
+
+
+class Rope:
+    __slots__ = ("_parts", "_count", "length")
+
+    def __init__(self, parts: list[str], length: int) -> None:
+        self._parts = parts
+        self._count = len(parts)
+        self.length = length
+
+    def append(self, piece: str) -> "Rope":
+        parts = self._parts
+        if len(parts) != self._count:
+            parts = parts[:self._count]
+        parts.append(piece)
+        return Rope(parts, self.length + len(piece))
+
+    def __str__(self) -> str:
+        if self._count == 1:
+            return self._parts[0]
+        flat = "".join(self._parts[:self._count])
+        self._parts = [flat]
+        self._count = 1
+        return flat
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (str, Rope)):
+            return str(self) == str(other)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(str(self))
+
+
+def concat(left: str | Rope, right: str | Rope) -> str | Rope:
+    if type(left) is Rope:
+        return left.append(str(right))
+    right = str(right)
+    length = len(left) + len(right)
+    if length < ROPE_THRESHOLD:
+        return left + right
+    return Rope([left, right], length)
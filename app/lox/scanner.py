@@ -1,16 +1,61 @@
+import re
 import sys
+from collections.abc import Iterator
 
 from .error import error
 from .token import Token, TokenLiteral, TokenType
+from .token_buffer import TokenBuffer
+
+
+TOKEN_PATTERN = re.compile(
+    r"[\t\x0b\x0c\r\x1c-\x1f ]*+(?:"
+    r"(?P<identifier>[A-Za-z_][A-Za-z0-9_]*+)(?![^\x00-\x7f])"
+    r"|(?P<operator>[!=<>]=?|[(){}\[\],.\-+;*]|/(?!/))"
+    r"|(?P<newline>\n[\t\n\x0b\x0c\r\x1c-\x1f ]*+)"
+    r"|(?P<number>[0-9]++(?:\.[0-9]++)?+)(?![^\x00-\x7f]|\.[^\x00-\x7f])"
+    r'|(?P<string>"[^"]*")'
+    r"|(?P<comment>//[^\n]*)"
+    r")"
+)
+
+OPERATORS = {
+    "(": TokenType.LEFT_PAREN,
+    ")": TokenType.RIGHT_PAREN,
+    "{": TokenType.LEFT_BRACE,
+    "}": TokenType.RIGHT_BRACE,
+    "[": TokenType.LEFT_BRACKET,
+    "]": TokenType.RIGHT_BRACKET,
+    ",": TokenType.COMMA,
+    ".": TokenType.DOT,
+    "-": TokenType.MINUS,
+    "+": TokenType.PLUS,
+    ";": TokenType.SEMICOLON,
+    "*": TokenType.STAR,
+    "/": TokenType.SLASH,
+    "=": TokenType.EQUAL,
+    "==": TokenType.EQUAL_EQUAL,
+    "!": TokenType.BANG,
+    "!=": TokenType.BANG_EQUAL,
+    ">": TokenType.GREATER,
+    ">=": TokenType.GREATER_EQUAL,
+    "<": TokenType.LESS,
+    "<=": TokenType.LESS_EQUAL,
+}
+
+OPERATOR_CODES = {lexeme: token_type.value for lexeme, token_type in OPERATORS.items()}
+
+CHUNK_SIZE = 4096
 
 
 class Scanner:
-    def __init__(self, source: str) -> None:
+    def __init__(self, source: str, fast: bool = True) -> None:
         self._source = source
+        self._fast = fast
         self._start = 0
         self._current = 0
-        self._tokens = []
+        self._tokens = TokenBuffer(source)
         self._has_error = False
+        self._done = False
         self._line = 1
 
         self._keywords = {
@@ -31,13 +76,81 @@ class Scanner:
             "var": TokenType.VAR,
             "while": TokenType.WHILE,
         }
+        self._keyword_codes = {lexeme: token_type.value for lexeme, token_type in self._keywords.items()}
 
     def scan_tokens(self) -> list[Token]:
-        while not self._is_at_end():
+        return list(self.tokens())
+
+    def tokens(self) -> Iterator[Token]:
+        buffer = TokenBuffer(self._source)
+        while not self._done:
+            self.scan_into(buffer, CHUNK_SIZE)
+            yield from buffer
+            buffer.discard_before(len(buffer))
+
+    def scan_into(self, tokens: TokenBuffer, count: int | None = None) -> None:
+        limit = sys.maxsize if count is None else len(tokens) + count
+        self._tokens = tokens
+        if self._fast:
+            self._scan_fast(tokens, limit)
+        while not self._is_at_end() and len(tokens) < limit:
             self._scan_token()
             self._start = self._current
-        self._add_token(TokenType.EOF)
-        return self._tokens
+        if self._is_at_end() and not self._done:
+            self._add_token(TokenType.EOF)
+            self._done = True
+
+    def scan_to_end(self) -> None:
+        buffer = TokenBuffer(self._source)
+        while not self._done:
+            self.scan_into(buffer, CHUNK_SIZE)
+            buffer.discard_before(len(buffer))
+
+    def _scan_fast(self, tokens: TokenBuffer, limit: int) -> None:
+        source = self._source
+        keywords = self._keyword_codes
+        literals = tokens.literals
+        types, starts, lengths, lines = tokens.types, tokens.starts, tokens.lengths, tokens.lines
+        match = TOKEN_PATTERN.match
+        identifier, number, string = TokenType.IDENTIFIER.value, TokenType.NUMBER.value, TokenType.STRING.value
+        end = len(source)
+        position = self._current
+        line = self._line
+
+        while position < end and len(types) < limit:
+            m = match(source, position)
+            if m is None:
+                self._start = self._current = position
+                self._line = line
+                self._scan_token()
+                position = self._current
+                line = self._line
+                continue
+
+            kind = m.lastgroup
+            start, position = m.span(kind)
+            if kind == "identifier":
+                types.append(keywords.get(source[start:position], identifier))
+            elif kind == "operator":
+                types.append(OPERATOR_CODES[source[start:position]])
+            elif kind == "newline":
+                line += source.count("\n", start, position)
+                continue
+            elif kind == "number":
+                literals[len(types)] = float(source[start:position])
+                types.append(number)
+            elif kind == "string":
+                line += source.count("\n", start, position)
+                literals[len(types)] = source[start + 1:position - 1]
+                types.append(string)
+            else:
+                continue
+            starts.append(start)
+            lengths.append(position - start)
+            lines.append(line)
+
+        self._start = self._current = position
+        self._line = line
 
     def has_error(self) -> bool:
         return self._has_error
@@ -56,6 +169,10 @@ class Scanner:
                 self._add_token(TokenType.LEFT_BRACE)
             case "}":
                 self._add_token(TokenType.RIGHT_BRACE)
+            case "[":
+                self._add_token(TokenType.LEFT_BRACKET)
+            case "]":
+                self._add_token(TokenType.RIGHT_BRACKET)
             case ",":
                 self._add_token(TokenType.COMMA)
             case ".":
@@ -101,8 +218,7 @@ class Scanner:
         return c
 
     def _add_token(self, token_type: TokenType, literal: TokenLiteral = None) -> None:
-        token = Token(token_type, self._get_lexeme(), literal, self._line)
-        self._tokens.append(token)
+        self._tokens.append(token_type, self._start, self._current - self._start, self._line, literal)
 
     def _get_lexeme(self) -> str:
         return self._source[self._start:self._current]
@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+
+class Shape:
+    __slots__ = ("slots", "_transitions")
+
+    def __init__(self, slots: dict[str, int] | None = None) -> None:
+        self.slots: dict[str, int] = {} if slots is None else slots
+        self._transitions: dict[str, Shape] = {}
+
+    def with_field(self, name: str) -> Shape:
+        shape = self._transitions.get(name)
+        if shape is None:
+            shape = self._transitions[name] = Shape(self.slots | {name: len(self.slots)})
+        return shape
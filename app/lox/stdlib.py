@@ -0,0 +1,127 @@
+import math
+import re
+import time
+from collections.abc import Callable
+from typing import Any
+
+from .lox_list import LoxList
+from .lox_map import LoxMap
+from .natives import NativeError, Natives, index, number, string
+from .rope import Rope
+
+
+NUMBER = re.compile(r"-?\d+(\.\d+)?")
+
+
+def standard_library() -> Natives:
+    natives = Natives()
+    natives.update(time_module())
+    natives.update(math_module())
+    natives.update(string_module())
+    natives.update(collections_module())
+    return natives
+
+
+def time_module() -> Natives:
+    natives = Natives()
+    natives.register("clock", 0, lambda interpreter: time.time())
+    natives.register("hrclock", 0, lambda interpreter: time.perf_counter())
+    return natives
+
+
+def math_module() -> Natives:
+    natives = Natives()
+    natives.register("abs", 1, lambda interpreter, x: abs(number(x)))
+    natives.register("sqrt", 1, lambda interpreter, x: _sqrt(number(x)))
+    natives.register("floor", 1, lambda interpreter, x: _integral(math.floor, number(x)))
+    natives.register("ceil", 1, lambda interpreter, x: _integral(math.ceil, number(x)))
+    natives.register("round", 1, lambda interpreter, x: _integral(_round_half_up, number(x)))
+    natives.register("min", 2, lambda interpreter, a, b: min(number(a), number(b)))
+    natives.register("max", 2, lambda interpreter, a, b: max(number(a), number(b)))
+    natives.register("pow", 2, lambda interpreter, a, b: _pow(number(a), number(b)))
+    natives.register("sin", 1, lambda interpreter, x: _unary(math.sin, number(x)))
+    natives.register("cos", 1, lambda interpreter, x: _unary(math.cos, number(x)))
+    natives.register("exp", 1, lambda interpreter, x: _unary(math.exp, number(x)))
+    natives.register("log", 1, lambda interpreter, x: _log(number(x)))
+    return natives
+
+
+def string_module() -> Natives:
+    natives = Natives()
+    natives.register("str", 1, lambda interpreter, value: interpreter.stringify(value))
+    natives.register("num", 1, lambda interpreter, value: _num(value))
+    natives.register("len", 1, lambda interpreter, value: _len(value))
+    natives.register("substring", 3, lambda interpreter, s, start, end: _substring(string(s), start, end))
+    natives.register("find", 2, lambda interpreter, s, needle: float(string(s).find(string(needle))))
+    return natives
+
+
+def collections_module() -> Natives:
+    natives = Natives()
+    natives.register("list", 0, lambda interpreter: LoxList([]))
+    natives.register("map", 0, lambda interpreter: LoxMap())
+    return natives
+
+
+def _sqrt(x: float) -> float:
+    return math.sqrt(x) if x >= 0 else math.nan
+
+
+def _log(x: float) -> float:
+    if x > 0:
+        return math.log(x)
+    return -math.inf if x == 0 else math.nan
+
+
+def _unary(function: Callable[[float], float], x: float) -> float:
+    try:
+        return function(x)
+    except OverflowError:
+        return math.inf
+    except ValueError:
+        return math.nan
+
+
+def _pow(a: float, b: float) -> float:
+    try:
+        return math.pow(a, b)
+    except OverflowError:
+        return math.inf
+    except ValueError:
+        return math.nan
+
+
+def _integral(function: Callable[[float], int], x: float) -> float:
+    return float(function(x)) if math.isfinite(x) else x
+
+
+def _round_half_up(x: float) -> int:
+    f = math.floor(x)
+    return f + 1 if x - f >= 0.5 else f
+
+
+def _num(value: Any) -> float | None:
+    if isinstance(value, float):
+        return value
+    if isinstance(value, (str, Rope)) and NUMBER.fullmatch(str(value).strip()):
+        return float(str(value))
+    return None
+
+
+def _len(value: Any) -> float:
+    if isinstance(value, str):
+        return float(len(value))
+    if isinstance(value, Rope):
+        return float(value.length)
+    if isinstance(value, LoxList):
+        return float(len(value.elements))
+    if isinstance(value, LoxMap):
+        return float(len(value.entries))
+    raise NativeError("Argument must be a string, list or map.")
+
+
+def _substring(s: str, start: Any, end: Any) -> str:
+    start, end = index(start), index(end)
+    if not 0 <= start <= end <= len(s):
+        raise NativeError("Index out of range.")
+    return s[start:end]
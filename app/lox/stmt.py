@@ -9,6 +9,7 @@ __all__ = [
     "BlockStmt",
     "ClassStmt",
     "ExpressionStmt",
+    "ForStmt",
     "FunctionStmt",
     "IfStmt",
     "PrintStmt",
@@ -40,6 +41,13 @@ class ExpressionStmt(Stmt):
     expression: Expr
 
 
+@dataclasses.dataclass(frozen=True)
+class ForStmt(Stmt):
+    condition: Expr
+    body: Stmt
+    increment: Expr
+
+
 @dataclasses.dataclass(frozen=True)
 class FunctionStmt(Stmt):
     name: Token
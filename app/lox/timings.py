@@ -0,0 +1,66 @@
+import contextlib
+import dataclasses
+import time
+import tracemalloc
+from collections.abc import Iterator
+from typing import Any, TextIO
+
+from .expr import Expr
+from .stmt import Stmt
+
+
+@dataclasses.dataclass(frozen=True)
+class PhaseTiming:
+    name: str
+    wall_time: float
+    cpu_time: float
+    peak_memory: int | None
+
+
+class Timings:
+    def __init__(self, trace_memory: bool = True) -> None:
+        self.trace_memory = trace_memory
+        self.phases: list[PhaseTiming] = []
+        self.counts: dict[str, int] = {}
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = self.trace_memory and not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            peak = tracemalloc.get_traced_memory()[1] if self.trace_memory else None
+            if started:
+                tracemalloc.stop()
+            self.phases.append(PhaseTiming(name, wall, cpu, peak))
+
+    def count(self, name: str, value: int) -> None:
+        self.counts[name] = value
+
+    def report(self) -> dict[str, Any]:
+        return {
+            "phases": [dataclasses.asdict(phase) for phase in self.phases],
+            "counts": dict(self.counts),
+        }
+
+    def write(self, stream: TextIO) -> None:
+        stream.write(f"{'phase':<10} {'wall ms':>10} {'cpu ms':>10} {'peak KiB':>10}\n")
+        for phase in self.phases:
+            peak = "-" if phase.peak_memory is None else f"{phase.peak_memory / 1024:.1f}"
+            stream.write(f"{phase.name:<10} {phase.wall_time * 1000:>10.3f} {phase.cpu_time * 1000:>10.3f} {peak:>10}\n")
+        for name, value in self.counts.items():
+            stream.write(f"{name}: {value}\n")
+
+
+def count_nodes(node: Any) -> int:
+    if isinstance(node, list):
+        return sum(count_nodes(item) for item in node)
+    if isinstance(node, (Expr, Stmt)):
+        return 1 + sum(count_nodes(getattr(node, field.name)) for field in dataclasses.fields(node))
+    return 0
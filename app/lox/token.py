@@ -23,6 +23,7 @@ TokenType = enum.Enum(
         "IDENTIFIER",
         "IF",
         "LEFT_BRACE",
+        "LEFT_BRACKET",
         "LEFT_PAREN",
         "LESS",
         "LESS_EQUAL",
@@ -34,6 +35,7 @@ TokenType = enum.Enum(
         "PRINT",
         "RETURN",
         "RIGHT_BRACE",
+        "RIGHT_BRACKET",
         "RIGHT_PAREN",
         "SEMICOLON",
         "SLASH",
@@ -0,0 +1,58 @@
+import sys
+from array import array
+from collections.abc import Iterator
+
+from .token import Token, TokenLiteral, TokenType
+
+
+TOKEN_TYPES: list[TokenType | None] = [None, *TokenType]
+
+
+class TokenBuffer:
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self.types = array("B")
+        self.starts = array("I")
+        self.lengths = array("I")
+        self.lines = array("I")
+        self.literals: dict[int, TokenLiteral] = {}
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __iter__(self) -> Iterator[Token]:
+        for index in range(len(self.types)):
+            yield self.token(index)
+
+    def append(
+        self, token_type: TokenType, start: int, length: int, line: int, literal: TokenLiteral = None
+    ) -> None:
+        if literal is not None:
+            self.literals[len(self.types)] = literal
+        self.types.append(token_type.value)
+        self.starts.append(start)
+        self.lengths.append(length)
+        self.lines.append(line)
+
+    def token(self, index: int) -> Token:
+        return Token(self.token_type(index), self.lexeme(index), self.literals.get(index), self.lines[index])
+
+    def token_type(self, index: int) -> TokenType:
+        return TOKEN_TYPES[self.types[index]]
+
+    def lexeme(self, index: int) -> str:
+        start = self.starts[index]
+        lexeme = self.source[start:start + self.lengths[index]]
+        if self.types[index] == TokenType.IDENTIFIER.value:
+            return sys.intern(lexeme)
+        return lexeme
+
+    def line(self, index: int) -> int:
+        return self.lines[index]
+
+    def discard_before(self, index: int) -> None:
+        del self.types[:index]
+        del self.starts[:index]
+        del self.lengths[:index]
+        del self.lines[:index]
+        self.literals = {i - index: literal for i, literal in self.literals.items() if i >= index}
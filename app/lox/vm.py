@@ -0,0 +1,529 @@
+from __future__ import annotations
+from typing import Any
+
+from .bytecode import FunctionProto, OpCode
+from .compiler import Compiler
+from .environment import UNDEFINED
+from .error import runtime_error
+from .interpreter import DEFAULT_MAX_DEPTH, Interpreter
+from .lox_callable import LoxCallable
+from .lox_class import LoxClass, LoxInstance
+from .lox_list import LoxList
+from .natives import NativeError, Natives
+from .output import Output
+from .rope import Rope, concat
+from .stmt import Stmt
+
+
+OP_ADD = OpCode.ADD.value
+OP_BUILD_LIST = OpCode.BUILD_LIST.value
+OP_CALL = OpCode.CALL.value
+OP_CHECK_FIELDS = OpCode.CHECK_FIELDS.value
+OP_CLASS = OpCode.CLASS.value
+OP_CLOSE_UPVALUE = OpCode.CLOSE_UPVALUE.value
+OP_CLOSURE = OpCode.CLOSURE.value
+OP_CONSTANT = OpCode.CONSTANT.value
+OP_DEFINE_GLOBAL = OpCode.DEFINE_GLOBAL.value
+OP_DIVIDE = OpCode.DIVIDE.value
+OP_EQUAL = OpCode.EQUAL.value
+OP_FALSE = OpCode.FALSE.value
+OP_GET_GLOBAL = OpCode.GET_GLOBAL.value
+OP_GET_INDEX = OpCode.GET_INDEX.value
+OP_GET_LOCAL = OpCode.GET_LOCAL.value
+OP_GET_METHOD = OpCode.GET_METHOD.value
+OP_GET_PROPERTY = OpCode.GET_PROPERTY.value
+OP_GET_SUPER = OpCode.GET_SUPER.value
+OP_GET_SUPER_METHOD = OpCode.GET_SUPER_METHOD.value
+OP_GET_UPVALUE = OpCode.GET_UPVALUE.value
+OP_GREATER = OpCode.GREATER.value
+OP_GREATER_EQUAL = OpCode.GREATER_EQUAL.value
+OP_INCREMENT_LOCAL = OpCode.INCREMENT_LOCAL.value
+OP_INVOKE = OpCode.INVOKE.value
+OP_JUMP = OpCode.JUMP.value
+OP_JUMP_IF_FALSE = OpCode.JUMP_IF_FALSE.value
+OP_LESS = OpCode.LESS.value
+OP_LESS_EQUAL = OpCode.LESS_EQUAL.value
+OP_MULTIPLY = OpCode.MULTIPLY.value
+OP_NEGATE = OpCode.NEGATE.value
+OP_NIL = OpCode.NIL.value
+OP_NOT = OpCode.NOT.value
+OP_NOT_EQUAL = OpCode.NOT_EQUAL.value
+OP_POP = OpCode.POP.value
+OP_PRINT = OpCode.PRINT.value
+OP_RETURN = OpCode.RETURN.value
+OP_SET_GLOBAL = OpCode.SET_GLOBAL.value
+OP_SET_INDEX = OpCode.SET_INDEX.value
+OP_SET_LOCAL = OpCode.SET_LOCAL.value
+OP_SET_PROPERTY = OpCode.SET_PROPERTY.value
+OP_SET_UPVALUE = OpCode.SET_UPVALUE.value
+OP_SUBTRACT = OpCode.SUBTRACT.value
+OP_TAIL_CALL = OpCode.TAIL_CALL.value
+OP_TAIL_INVOKE = OpCode.TAIL_INVOKE.value
+OP_TRUE = OpCode.TRUE.value
+
+
+class Upvalue:
+    __slots__ = ("cells", "index")
+
+    def __init__(self, stack: list[Any], index: int) -> None:
+        self.cells = stack
+        self.index = index
+
+    def close(self) -> None:
+        self.cells = [self.cells[self.index]]
+        self.index = 0
+
+
+class Closure(LoxCallable):
+    def __init__(self, function: FunctionProto, upvalues: list[Upvalue]) -> None:
+        self.function = function
+        self.upvalues = upvalues
+
+    def call(self, interpreter: VM, arguments: list[Any]) -> Any:
+        return interpreter.call_closure(self, arguments)
+
+    def call_method(self, interpreter: VM, receiver: LoxInstance, arguments: list[Any]) -> Any:
+        return interpreter.call_closure(self, arguments, receiver)
+
+    def bind(self, instance: LoxInstance) -> BoundMethod:
+        return BoundMethod(instance, self)
+
+    @property
+    def arity(self) -> int:
+        return self.function.arity
+
+    def __str__(self) -> str:
+        return str(self.function)
+
+
+class BoundMethod(LoxCallable):
+    def __init__(self, receiver: LoxInstance, method: Closure) -> None:
+        self.receiver = receiver
+        self.method = method
+
+    def call(self, interpreter: VM, arguments: list[Any]) -> Any:
+        return interpreter.call_closure(self.method, arguments, self.receiver)
+
+    @property
+    def arity(self) -> int:
+        return self.method.arity
+
+    def __str__(self) -> str:
+        return str(self.method)
+
+
+class CallFrame:
+    __slots__ = ("closure", "ip", "base")
+
+    def __init__(self, closure: Closure, base: int) -> None:
+        self.closure = closure
+        self.ip = 0
+        self.base = base
+
+
+class VM(Interpreter):
+    def __init__(
+        self, output: Output | None = None, max_depth: int = DEFAULT_MAX_DEPTH, natives: Natives | None = None
+    ) -> None:
+        super().__init__(output, max_depth, natives)
+        self._stack: list[Any] = []
+        self._frames: list[CallFrame] = []
+        self._open_upvalues: list[Upvalue] = []
+
+    def _execute_program(self, stmts: list[Stmt]) -> None:
+        closure = Closure(Compiler(self.globals, self.tail_calls).compile(stmts), [])
+        self.call_closure(closure, [])
+
+    def call_closure(self, closure: Closure, arguments: list[Any], receiver: Any = None) -> Any:
+        depth = len(self._frames)
+        self._stack.append(closure if receiver is None else receiver)
+        self._stack.extend(arguments)
+        self._push_frame(closure, len(arguments), self._current_line())
+        return self._run(depth)
+
+    def _current_line(self) -> int:
+        if not self._frames:
+            return 0
+        frame = self._frames[-1]
+        return frame.closure.function.chunk.lines[frame.ip - 1]
+
+    def _push_frame(self, closure: Closure, argc: int, line: int) -> None:
+        if argc != closure.function.arity:
+            runtime_error(line, "Expected {} arguments but got {}.".format(closure.function.arity, argc))
+        if len(self._frames) > self.max_depth:
+            runtime_error(line, "Stack overflow.")
+        self._frames.append(CallFrame(closure, len(self._stack) - argc - 1))
+
+    def _reuse_frame(self, callee: Any, argc: int, line: int) -> None:
+        stack = self._stack
+        if isinstance(callee, BoundMethod):
+            stack[-argc - 1] = callee.receiver
+            callee = callee.method
+        if not isinstance(callee, Closure):
+            self._call_value(callee, argc, line)
+            return
+
+        if argc != callee.function.arity:
+            runtime_error(line, "Expected {} arguments but got {}.".format(callee.function.arity, argc))
+        frame = self._frames[-1]
+        if self._open_upvalues and self._open_upvalues[-1].index >= frame.base:
+            self._close_upvalues(frame.base)
+        stack[frame.base:] = stack[len(stack) - argc - 1:]
+        frame.closure = callee
+        frame.ip = 0
+
+    def _call_value(self, callee: Any, argc: int, line: int) -> None:
+        stack = self._stack
+        if isinstance(callee, BoundMethod):
+            stack[-argc - 1] = callee.receiver
+            self._push_frame(callee.method, argc, line)
+        elif isinstance(callee, LoxClass):
+            stack[-argc - 1] = LoxInstance(callee)
+            initializer = callee.initializer
+            if initializer is not None:
+                self._push_frame(initializer, argc, line)
+            elif argc != 0:
+                runtime_error(line, "Expected 0 arguments but got {}.".format(argc))
+        elif isinstance(callee, LoxCallable):
+            if argc != callee.arity:
+                runtime_error(line, "Expected {} arguments but got {}.".format(callee.arity, argc))
+            arguments = stack[len(stack) - argc:]
+            del stack[len(stack) - argc - 1:]
+            try:
+                stack.append(callee.call(self, arguments))
+            except NativeError as ex:
+                runtime_error(line, ex.message)
+        else:
+            runtime_error(line, "Can only call functions and classes.")
+
+    def _capture_upvalue(self, location: int) -> Upvalue:
+        open_upvalues = self._open_upvalues
+        i = len(open_upvalues)
+        while i > 0 and open_upvalues[i - 1].index >= location:
+            upvalue = open_upvalues[i - 1]
+            if upvalue.index == location:
+                return upvalue
+            i -= 1
+        upvalue = Upvalue(self._stack, location)
+        open_upvalues.insert(i, upvalue)
+        return upvalue
+
+    def _close_upvalues(self, last: int) -> None:
+        open_upvalues = self._open_upvalues
+        while open_upvalues and open_upvalues[-1].index >= last:
+            open_upvalues.pop().close()
+
+    def _run(self, exit_depth: int) -> Any:
+        stack = self._stack
+        frames = self._frames
+        open_upvalues = self._open_upvalues
+        global_values = self.globals.values
+        global_names = self.globals.names
+        stringify = self._stringify
+        write_line = self.output.write_line
+
+        frame = frames[-1]
+        closure = frame.closure
+        chunk = closure.function.chunk
+        code, constants, lines = chunk.code, chunk.constants, chunk.lines
+        upvalues = closure.upvalues
+        base = frame.base
+        ip = frame.ip
+
+        while True:
+            op = code[ip]
+            ip += 1
+
+            if op == OP_GET_LOCAL:
+                stack.append(stack[base + code[ip]])
+                ip += 1
+            elif op == OP_CONSTANT:
+                stack.append(constants[code[ip]])
+                ip += 1
+            elif op == OP_SET_LOCAL:
+                stack[base + code[ip]] = stack[-1]
+                ip += 1
+            elif op == OP_POP:
+                stack.pop()
+            elif op == OP_GET_GLOBAL:
+                value = global_values[code[ip]]
+                if value is UNDEFINED:
+                    runtime_error(lines[ip], f"Undefined variable '{global_names[code[ip]]}'.")
+                stack.append(value)
+                ip += 1
+            elif op == OP_JUMP_IF_FALSE:
+                value = stack[-1]
+                if value is None or value is False:
+                    ip = code[ip]
+                else:
+                    ip += 1
+            elif op == OP_JUMP:
+                ip = code[ip]
+            elif op == OP_ADD:
+                b = stack.pop()
+                a = stack[-1]
+                if isinstance(a, float) and isinstance(b, float):
+                    stack[-1] = a + b
+                elif isinstance(a, (str, Rope)) and isinstance(b, (str, Rope)):
+                    stack[-1] = concat(a, b)
+                else:
+                    runtime_error(lines[ip - 1], "Operands must be two numbers or two strings.")
+            elif op == OP_LESS:
+                b = stack.pop()
+                a = stack[-1]
+                if not (isinstance(a, float) and isinstance(b, float)):
+                    runtime_error(lines[ip - 1], "Operands must be numbers.")
+                stack[-1] = a < b
+            elif op == OP_SUBTRACT:
+                b = stack.pop()
+                a = stack[-1]
+                if not (isinstance(a, float) and isinstance(b, float)):
+                    runtime_error(lines[ip - 1], "Operands must be numbers.")
+                stack[-1] = a - b
+            elif op == OP_INCREMENT_LOCAL:
+                slot = base + code[ip]
+                value = stack[slot]
+                if not isinstance(value, float):
+                    if code[ip + 2] == OP_ADD:
+                        runtime_error(lines[ip - 1], "Operands must be two numbers or two strings.")
+                    runtime_error(lines[ip - 1], "Operands must be numbers.")
+                value = stack[slot] = value + constants[code[ip + 1]]
+                stack.append(value)
+                ip += 3
+            elif op == OP_CALL:
+                argc = code[ip]
+                ip += 1
+                frame.ip = ip
+                callee = stack[-argc - 1]
+                if isinstance(callee, Closure):
+                    self._push_frame(callee, argc, lines[ip - 1])
+                else:
+                    self._call_value(callee, argc, lines[ip - 1])
+                frame = frames[-1]
+                closure = frame.closure
+                chunk = closure.function.chunk
+                code, constants, lines = chunk.code, chunk.constants, chunk.lines
+                upvalues = closure.upvalues
+                base = frame.base
+                ip = frame.ip
+            elif op == OP_INVOKE:
+                argc = code[ip]
+                ip += 1
+                frame.ip = ip
+                method = stack[-argc - 1]
+                del stack[-argc - 1]
+                if method is not None:
+                    self._push_frame(method, argc, lines[ip - 1])
+                else:
+                    self._call_value(stack[-argc - 1], argc, lines[ip - 1])
+                frame = frames[-1]
+                closure = frame.closure
+                chunk = closure.function.chunk
+                code, constants, lines = chunk.code, chunk.constants, chunk.lines
+                upvalues = closure.upvalues
+                base = frame.base
+                ip = frame.ip
+            elif op == OP_TAIL_CALL or op == OP_TAIL_INVOKE:
+                argc = code[ip]
+                ip += 1
+                frame.ip = ip
+                if op == OP_TAIL_INVOKE:
+                    method = stack[-argc - 1]
+                    del stack[-argc - 1]
+                    if method is None:
+                        method = stack[-argc - 1]
+                else:
+                    method = stack[-argc - 1]
+                self._reuse_frame(method, argc, lines[ip - 1])
+                frame = frames[-1]
+                closure = frame.closure
+                chunk = closure.function.chunk
+                code, constants, lines = chunk.code, chunk.constants, chunk.lines
+                upvalues = closure.upvalues
+                base = frame.base
+                ip = frame.ip
+            elif op == OP_RETURN:
+                result = stack.pop()
+                if open_upvalues and open_upvalues[-1].index >= base:
+                    self._close_upvalues(base)
+                frames.pop()
+                del stack[base:]
+                if len(frames) == exit_depth:
+                    return result
+                stack.append(result)
+                frame = frames[-1]
+                closure = frame.closure
+                chunk = closure.function.chunk
+                code, constants, lines = chunk.code, chunk.constants, chunk.lines
+                upvalues = closure.upvalues
+                base = frame.base
+                ip = frame.ip
+            elif op == OP_GET_UPVALUE:
+                upvalue = upvalues[code[ip]]
+                stack.append(upvalue.cells[upvalue.index])
+                ip += 1
+            elif op == OP_SET_UPVALUE:
+                upvalue = upvalues[code[ip]]
+                upvalue.cells[upvalue.index] = stack[-1]
+                ip += 1
+            elif op == OP_GET_PROPERTY:
+                name = constants[code[ip]]
+                cache = constants[code[ip + 1]]
+                ip += 2
+                instance = stack[-1]
+                if not isinstance(instance, LoxInstance):
+                    stack[-1] = self._get_builtin_property(instance, name)
+                elif cache.key is instance.shape and type(cache.value) is int:
+                    stack[-1] = instance.values[cache.value]
+                else:
+                    stack[-1] = instance.get(name, cache)
+            elif op == OP_GET_METHOD:
+                name = constants[code[ip]]
+                cache = constants[code[ip + 1]]
+                ip += 2
+                instance = stack[-1]
+                if not isinstance(instance, LoxInstance):
+                    stack[-1] = self._get_builtin_property(instance, name)
+                    method = None
+                else:
+                    method = instance.find_member(name.lexeme, cache)
+                    if method is None or type(method) is int:
+                        stack[-1] = instance.get(name, cache)
+                        method = None
+                stack.append(method)
+            elif op == OP_CHECK_FIELDS:
+                if not isinstance(stack[-1], LoxInstance):
+                    runtime_error(lines[ip - 1], "Only instances have fields.")
+            elif op == OP_SET_PROPERTY:
+                name = constants[code[ip]]
+                cache = constants[code[ip + 1]]
+                ip += 2
+                value = stack.pop()
+                instance = stack[-1]
+                if not isinstance(instance, LoxInstance):
+                    runtime_error(name, "Only instances have fields.")
+                if cache.key is instance.shape and cache.value[0] is cache.key:
+                    instance.values[cache.value[1]] = value
+                else:
+                    instance.set(name, value, cache)
+                stack[-1] = value
+            elif op == OP_GET_INDEX:
+                index = stack.pop()
+                stack[-1] = self._get_index(stack[-1], index, lines[ip - 1])
+            elif op == OP_SET_INDEX:
+                value = stack.pop()
+                index = stack.pop()
+                self._set_index(stack[-1], index, value, lines[ip - 1])
+                stack[-1] = value
+            elif op == OP_BUILD_LIST:
+                count = code[ip]
+                ip += 1
+                elements = stack[len(stack) - count:]
+                del stack[len(stack) - count:]
+                stack.append(LoxList(elements))
+            elif op == OP_SET_GLOBAL:
+                if global_values[code[ip]] is UNDEFINED:
+                    runtime_error(lines[ip], f"Undefined variable '{global_names[code[ip]]}'.")
+                global_values[code[ip]] = stack[-1]
+                ip += 1
+            elif op == OP_NIL:
+                stack.append(None)
+            elif op == OP_TRUE:
+                stack.append(True)
+            elif op == OP_FALSE:
+                stack.append(False)
+            elif op == OP_EQUAL:
+                b = stack.pop()
+                stack[-1] = stack[-1] == b
+            elif op == OP_NOT_EQUAL:
+                b = stack.pop()
+                stack[-1] = stack[-1] != b
+            elif op == OP_GREATER:
+                b = stack.pop()
+                a = stack[-1]
+                if not (isinstance(a, float) and isinstance(b, float)):
+                    runtime_error(lines[ip - 1], "Operands must be numbers.")
+                stack[-1] = a > b
+            elif op == OP_GREATER_EQUAL:
+                b = stack.pop()
+                a = stack[-1]
+                if not (isinstance(a, float) and isinstance(b, float)):
+                    runtime_error(lines[ip - 1], "Operands must be numbers.")
+                stack[-1] = a >= b
+            elif op == OP_LESS_EQUAL:
+                b = stack.pop()
+                a = stack[-1]
+                if not (isinstance(a, float) and isinstance(b, float)):
+                    runtime_error(lines[ip - 1], "Operands must be numbers.")
+                stack[-1] = a <= b
+            elif op == OP_MULTIPLY:
+                b = stack.pop()
+                a = stack[-1]
+                if not (isinstance(a, float) and isinstance(b, float)):
+                    runtime_error(lines[ip - 1], "Operands must be numbers.")
+                stack[-1] = a * b
+            elif op == OP_DIVIDE:
+                b = stack.pop()
+                a = stack[-1]
+                if not (isinstance(a, float) and isinstance(b, float)):
+                    runtime_error(lines[ip - 1], "Operands must be numbers.")
+                stack[-1] = a / b
+            elif op == OP_NOT:
+                value = stack[-1]
+                stack[-1] = value is None or value is False
+            elif op == OP_NEGATE:
+                value = stack[-1]
+                if not isinstance(value, float):
+                    runtime_error(lines[ip - 1], "Operand must be a number.")
+                stack[-1] = -value
+            elif op == OP_PRINT:
+                write_line(stringify(stack.pop()))
+            elif op == OP_DEFINE_GLOBAL:
+                global_values[code[ip]] = stack.pop()
+                ip += 1
+            elif op == OP_CLOSURE:
+                function = constants[code[ip]]
+                ip += 1
+                captured = []
+                for _ in range(function.upvalue_count):
+                    if code[ip]:
+                        captured.append(self._capture_upvalue(base + code[ip + 1]))
+                    else:
+                        captured.append(upvalues[code[ip + 1]])
+                    ip += 2
+                stack.append(Closure(function, captured))
+            elif op == OP_CLOSE_UPVALUE:
+                self._close_upvalues(len(stack) - 1)
+                stack.pop()
+            elif op == OP_GET_SUPER:
+                name = constants[code[ip]]
+                cache = constants[code[ip + 1]]
+                ip += 2
+                superclass = stack.pop()
+                method = superclass.find_method(name.lexeme, cache)
+                if method is None:
+                    runtime_error(name, "Undefined property '" + name.lexeme + "'.")
+                stack[-1] = method.bind(stack[-1])
+            elif op == OP_GET_SUPER_METHOD:
+                name = constants[code[ip]]
+                cache = constants[code[ip + 1]]
+                ip += 2
+                method = stack[-1].find_method(name.lexeme, cache)
+                if method is None:
+                    runtime_error(name, "Undefined property '" + name.lexeme + "'.")
+                stack[-1] = method
+            elif op == OP_CLASS:
+                name = constants[code[ip]]
+                method_count = code[ip + 1]
+                has_superclass = code[ip + 2]
+                ip += 3
+                methods = {}
+                if method_count:
+                    methods = {method.function.name: method for method in stack[-method_count:]}
+                    del stack[-method_count:]
+                superclass = None
+                if has_superclass:
+                    superclass = stack[-1]
+                    if not isinstance(superclass, LoxClass):
+                        runtime_error(lines[ip - 1], "Superclass must be a class.")
+                stack.append(LoxClass(name, superclass, methods))
@@ -1,60 +1,239 @@
 import argparse
+import contextlib
+import json
 import sys
+from collections.abc import Callable, Sequence
 
 import lox
 
 
+ENGINES = {
+    "closure": lox.ClosureInterpreter,
+    "tree": lox.Interpreter,
+    "vm": lox.VM,
+}
+
+PASSES = {
+    "optimize": lox.Optimizer,
+    "lower": lox.Lowerer,
+}
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser()
-    parser.add_argument("command", type=str, choices=["evaluate", "parse", "run", "tokenize"])
+    parser.add_argument("command", type=str, choices=["evaluate", "parse", "profile", "run", "tokenize"])
     parser.add_argument("filename", type=str)
+    parser.add_argument("--engine", type=str, choices=sorted(ENGINES), default="tree")
+    parser.add_argument("--cache", dest="cache", action="store_true")
+    parser.add_argument("--no-cache", dest="cache", action="store_false")
+    parser.add_argument("--arena", action="store_true")
+    parser.add_argument("--max-depth", type=int, default=lox.DEFAULT_MAX_DEPTH)
+    parser.add_argument("--timings", action="store_true")
+    parser.add_argument("--timings-json", type=str, default=None)
+    parser.add_argument("--no-trace-memory", action="store_true")
+    parser.add_argument("--profile-json", type=str, default=None)
+    parser.add_argument("--profile-limit", type=int, default=20)
+    parser.add_argument("--buffering", type=str, choices=["full", "line", "none"], default=None)
+    parser.add_argument("--buffer-size", type=int, default=lox.DEFAULT_BUFFER_SIZE)
     return parser.parse_args()
 
 
-def tokenize(source: str, print_tokens: bool = False) -> list[lox.Token]:
+def tokenize(source: str, output: lox.Output | None = None) -> None:
+    output = lox.Output() if output is None else output
     scanner = lox.Scanner(source)
-    tokens = scanner.scan_tokens()
-    if print_tokens:
-        for token in tokens:
-            print(token)
+    for token in scanner.tokens():
+        output.write_line(str(token))
+    output.flush()
     if scanner.has_error():
         sys.exit(65)
-    return tokens
 
 
-def parse_to_expr(tokens: list[lox.Token], print_expr: bool = False) -> lox.Expr:
+def phase(timings: lox.Timings | None, name: str) -> contextlib.AbstractContextManager[None]:
+    return contextlib.nullcontext() if timings is None else timings.phase(name)
+
+
+def parse[T](source: str, parse_tokens: Callable[[lox.Parser], T], timings: lox.Timings | None = None) -> T:
+    scanner = lox.Scanner(source)
+    tokens = lox.TokenBuffer(source)
+    if timings is not None:
+        with timings.phase("scan"):
+            scanner.scan_into(tokens)
+        timings.count("tokens", len(tokens))
     try:
-        expr = lox.Parser(tokens).parse_to_expr()
-    except lox.ParseError:
+        with phase(timings, "parse"):
+            result = parse_tokens(lox.Parser(tokens, scanner))
+    except lox.ParseError as ex:
+        scanner.scan_to_end()
+        if not scanner.has_error():
+            ex.report()
         sys.exit(65)
+
+    scanner.scan_to_end()
+    if scanner.has_error():
+        sys.exit(65)
+    return result
+
+
+def parse_to_expr(source: str, print_expr: bool = False) -> lox.Expr:
+    expr = parse(source, lox.Parser.parse_to_expr)
     if print_expr:
         lox.AstPrinter().print(expr)
     return expr
 
 
-def parse_to_stmts(tokens: list[lox.Token]) -> list[lox.Stmt]:
-    try:
-        return lox.Parser(tokens).parse_to_stmts()
-    except lox.ParseError:
-        sys.exit(65)
+def parse_to_stmts(source: str, timings: lox.Timings | None = None) -> list[lox.Stmt]:
+    stmts = parse(source, lox.Parser.parse_to_stmts, timings)
+    if timings is not None:
+        timings.count("nodes", lox.count_nodes(stmts))
+    return stmts
+
 
+def make_output(buffering: str | None = None, buffer_size: int = lox.DEFAULT_BUFFER_SIZE) -> lox.Output:
+    mode = None if buffering is None else lox.BufferMode[buffering.upper()]
+    return lox.Output(buffer_size=buffer_size, mode=mode)
 
-def evaluate(expr: lox.Expr) -> None:
+
+def evaluate(expr: lox.Expr, output: lox.Output | None = None) -> None:
     try:
-        lox.Interpreter().interpret_expr(expr)
+        lox.Interpreter(output).interpret_expr(expr)
     except RuntimeError:
         sys.exit(70)
 
 
-def run(stmts: list[lox.Stmt]) -> None:
+def parse_to_arena(source: str, timings: lox.Timings | None = None) -> lox.Arena:
+    arena = lox.Arena()
+
+    def parse_tokens(parser: lox.Parser) -> lox.Arena:
+        for stmt in parser.declarations():
+            arena.add_root(stmt)
+        return arena
+
+    arena = parse(source, parse_tokens, timings)
+    if timings is not None:
+        timings.count("nodes", len(arena))
+    return arena
+
+
+def resolve(
+    stmts: Sequence[lox.Stmt], interpreter: lox.Interpreter, timings: lox.Timings | None = None
+) -> lox.Program:
     try:
-        interpreter = lox.Interpreter()
-        lox.Resolver(interpreter).resolve(stmts)
-        interpreter.interpret_stmts(stmts)
+        with phase(timings, "resolve"):
+            lox.Resolver(interpreter).resolve(stmts)
     except lox.ResolveError:
         sys.exit(65)
+    return lox.Program(stmts, interpreter.locals, interpreter.globals.names, interpreter.tail_calls)
+
+
+def optimize(
+    program: lox.Program, interpreter: lox.Interpreter, timings: lox.Timings | None = None
+) -> lox.Program:
+    stmts = program.stmts
+    for name, optimizer in PASSES.items():
+        with phase(timings, name):
+            stmts = optimizer(interpreter).optimize(stmts)
+    return lox.Program(stmts, program.locals, program.globals, program.tail_calls)
+
+
+def pipeline() -> list[str]:
+    return [f"{name}={optimizer.__module__}.{optimizer.__qualname__}" for name, optimizer in PASSES.items()]
+
+
+def load_program(
+    source: str, interpreter: lox.Interpreter, use_cache: bool = False, timings: lox.Timings | None = None
+) -> lox.Program:
+    cache = lox.ProgramCache(pipeline=pipeline()) if use_cache else None
+
+    program = None
+    if cache is not None:
+        with phase(timings, "load"):
+            program = cache.load(source, interpreter.globals.names)
+    if program is not None:
+        for name in program.globals:
+            interpreter.globals.slot(name)
+        for expr, (depth, slot) in program.locals.items():
+            interpreter.resolve(expr, depth, slot)
+        for expr in program.tail_calls:
+            interpreter.resolve_tail_call(expr)
+        return program
+
+    program = resolve(parse_to_stmts(source, timings), interpreter, timings)
+    program = optimize(program, interpreter, timings)
+    if cache is not None:
+        with phase(timings, "store"):
+            cache.store(source, program)
+    return program
+
+
+def load_arena_program(source: str, interpreter: lox.Interpreter, timings: lox.Timings | None = None) -> lox.Program:
+    arena = parse_to_arena(source, timings)
+    interpreter.locals = lox.ArenaLocals(arena)
+    return optimize(resolve(arena.statements(), interpreter, timings), interpreter, timings)
+
+
+def run(
+    source: str,
+    engine: str = "tree",
+    use_cache: bool = False,
+    output: lox.Output | None = None,
+    use_arena: bool = False,
+    max_depth: int = lox.DEFAULT_MAX_DEPTH,
+    timings: lox.Timings | None = None,
+) -> None:
+    interpreter = ENGINES[engine](output, max_depth)
+    if use_arena:
+        program = load_arena_program(source, interpreter, timings)
+    else:
+        program = load_program(source, interpreter, use_cache, timings)
+    try:
+        with phase(timings, "execute"):
+            interpreter.interpret_stmts(program.stmts)
+    except RuntimeError:
+        sys.exit(70)
+
+
+def report_timings(timings: lox.Timings, json_path: str | None) -> None:
+    if json_path is None:
+        timings.write(sys.stderr)
+        return
+    with open(json_path, mode="w") as file:
+        json.dump(timings.report(), file, indent=2)
+
+
+def profile(
+    source: str,
+    output: lox.Output | None = None,
+    max_depth: int = lox.DEFAULT_MAX_DEPTH,
+    json_path: str | None = None,
+    limit: int = 20,
+) -> None:
+    interpreter = lox.ProfilingInterpreter(output, max_depth)
+    program = load_program(source, interpreter, use_cache=False)
+    try:
+        interpreter.interpret_stmts(program.stmts)
     except RuntimeError:
         sys.exit(70)
+    finally:
+        report = interpreter.report()
+        print_profile(report, source.splitlines(), limit)
+        if json_path is not None:
+            with open(json_path, mode="w") as file:
+                json.dump(report, file, indent=2)
+
+
+def print_profile(report: dict, lines: list[str], limit: int) -> None:
+    print(f"total: {report['total_time'] * 1000:.3f} ms", file=sys.stderr)
+    print(f"{'calls':>10} {'self ms':>10} {'cum ms':>10}  function", file=sys.stderr)
+    for function in report["functions"][:limit]:
+        print(
+            f"{function['calls']:>10} {function['self_time'] * 1000:>10.3f} {function['cumulative_time'] * 1000:>10.3f}"
+            f"  {function['name']} (line {function['line']})",
+            file=sys.stderr,
+        )
+    print(f"{'hits':>10} {'ms':>10} {'line':>10}  source", file=sys.stderr)
+    for line in report["lines"][:limit]:
+        text = lines[line["line"] - 1].strip() if 0 < line["line"] <= len(lines) else ""
+        print(f"{line['hits']:>10} {line['time'] * 1000:>10.3f} {line['line']:>10}  {text}", file=sys.stderr)
 
 
 def main() -> None:
@@ -64,13 +243,36 @@ def main() -> None:
         source = file.read()
 
     if args.command == "tokenize":
-        tokenize(source, print_tokens=True)
+        tokenize(source, make_output(args.buffering, args.buffer_size))
     elif args.command == "parse":
-        parse_to_expr(tokenize(source), print_expr=True)
+        parse_to_expr(source, print_expr=True)
     elif args.command == "evaluate":
-        evaluate(parse_to_expr(tokenize(source)))
+        evaluate(parse_to_expr(source), make_output(args.buffering, args.buffer_size))
     elif args.command == "run":
-        run(parse_to_stmts(tokenize(source)))
+        output = make_output(args.buffering, args.buffer_size)
+        timings = lox.Timings(trace_memory=not args.no_trace_memory) if args.timings or args.timings_json is not None else None
+        try:
+            run(
+                source,
+                args.engine,
+                use_cache=args.cache,
+                output=output,
+                use_arena=args.arena,
+                max_depth=args.max_depth,
+                timings=timings,
+            )
+        finally:
+            if timings is not None:
+                report_timings(timings, args.timings_json)
+    elif args.command == "profile":
+        output = make_output(args.buffering, args.buffer_size)
+        profile(
+            source,
+            output=output,
+            max_depth=args.max_depth,
+            json_path=args.profile_json,
+            limit=args.profile_limit,
+        )
     else:
         print(f"Unknown command: {args.command}", file=sys.stderr)
         sys.exit(1)
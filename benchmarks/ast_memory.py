@@ -0,0 +1,64 @@
+import argparse
+import pathlib
+import sys
+import tracemalloc
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / "app"))
+
+import lox
+
+
+FUNCTION = """fun f{index}(a, b) {{
+  var total = a * {index} + b;
+  if (total > 100) {{
+    return total - "x{index}".length;
+  }}
+  for (var i = 0; i < b; i = i + 1) {{
+    total = total + i;
+  }}
+  return total;
+}}
+"""
+
+
+def generate_source(functions: int) -> str:
+    return "".join(FUNCTION.format(index=index) for index in range(functions))
+
+
+def make_parser(source: str) -> lox.Parser:
+    scanner = lox.Scanner(source)
+    return lox.Parser(lox.TokenBuffer(source), scanner)
+
+
+def measure(source: str, use_arena: bool) -> tuple[int, int]:
+    tracemalloc.start()
+    if use_arena:
+        arena = lox.Arena()
+        for stmt in make_parser(source).declarations():
+            arena.add_root(stmt)
+        interpreter = lox.Interpreter()
+        interpreter.locals = lox.ArenaLocals(arena)
+        lox.Resolver(interpreter).resolve(arena.statements())
+    else:
+        stmts = make_parser(source).parse_to_stmts()
+        interpreter = lox.Interpreter()
+        lox.Resolver(interpreter).resolve(stmts)
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--functions", type=int, default=100_000)
+    args = parser.parse_args()
+
+    source = generate_source(args.functions)
+    print(f"source: {args.functions} functions, {len(source.encode()) / (1024 * 1024):.2f} MB")
+    for name, use_arena in (("dataclasses", False), ("arena", True)):
+        size, peak = measure(source, use_arena)
+        print(f"{name}: retained {size / (1024 * 1024):.2f} MB, peak {peak / (1024 * 1024):.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
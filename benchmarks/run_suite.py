@@ -0,0 +1,146 @@
+import argparse
+import json
+import os
+import pathlib
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "app"))
+
+import main as lox_main
+from ast_memory import generate_source
+
+
+MAIN = ROOT / "app" / "main.py"
+PROGRAMS = pathlib.Path(__file__).resolve().parent / "lox"
+BIG_SOURCE = "big_source"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("benchmarks", nargs="*")
+    parser.add_argument("--engine", type=str, choices=sorted(lox_main.ENGINES), default="tree")
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--big-source-functions", type=int, default=2_000)
+    parser.add_argument("--output", type=str, default=None)
+    parser.add_argument("--baseline", type=str, default=None)
+    parser.add_argument("--threshold", type=float, default=0.10)
+    return parser.parse_args()
+
+
+def collect(names: list[str], directory: pathlib.Path, big_source_functions: int) -> dict[str, pathlib.Path]:
+    programs = {path.stem: path for path in sorted(PROGRAMS.glob("*.lox"))}
+    big_source = directory / f"{BIG_SOURCE}.lox"
+    big_source.write_text(generate_source(big_source_functions))
+    programs[BIG_SOURCE] = big_source
+    if not names:
+        return programs
+    unknown = sorted(set(names) - set(programs))
+    if unknown:
+        raise SystemExit(f"Unknown benchmarks: {', '.join(unknown)}")
+    return {name: programs[name] for name in names}
+
+
+def run_once(path: pathlib.Path, engine: str, *options: str) -> tuple[float, int]:
+    command = [sys.executable, str(MAIN), "run", "--no-cache", "--engine", engine, *options, str(path)]
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    stderr = process.stderr.read().decode()
+    _, status, usage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - start
+    process.stderr.close()
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode != 0:
+        raise SystemExit(f"{path.name} exited with {process.returncode}:\n{stderr}")
+    return elapsed, usage.ru_maxrss
+
+
+def measure_phases(path: pathlib.Path, engine: str, directory: pathlib.Path) -> dict[str, Any]:
+    report = directory / f"{path.stem}.timings.json"
+    run_once(path, engine, "--timings-json", str(report), "--no-trace-memory")
+    timings = json.loads(report.read_text())
+    return {phase.pop("name"): phase for phase in timings["phases"]} | {"counts": timings["counts"]}
+
+
+def measure(path: pathlib.Path, engine: str, warmup: int, repeat: int, directory: pathlib.Path) -> dict[str, Any]:
+    for _ in range(warmup):
+        run_once(path, engine)
+    samples, peaks = [], []
+    for _ in range(repeat):
+        elapsed, peak = run_once(path, engine)
+        samples.append(elapsed)
+        peaks.append(peak)
+    return {
+        "wall": {
+            "min": min(samples),
+            "median": statistics.median(samples),
+            "mean": statistics.fmean(samples),
+        },
+        "samples": samples,
+        "peak_rss_kb": max(peaks),
+        "phases": measure_phases(path, engine, directory),
+    }
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], threshold: float) -> list[str]:
+    regressions = []
+    print(f"{'benchmark':<20} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, result in results["benchmarks"].items():
+        previous = baseline["benchmarks"].get(name)
+        if previous is None:
+            print(f"{name:<20} {'-':>10} {result['wall']['median']:>10.3f} {'new':>8}")
+            continue
+        before, after = previous["wall"]["median"], result["wall"]["median"]
+        change = after / before - 1
+        flag = " REGRESSION" if change > threshold else ""
+        print(f"{name:<20} {before:>10.3f} {after:>10.3f} {change:>+8.1%}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> None:
+    args = parse_args()
+
+    results: dict[str, Any] = {
+        "engine": args.engine,
+        "python": platform.python_version(),
+        "warmup": args.warmup,
+        "repeat": args.repeat,
+        "benchmarks": {},
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        programs = collect(args.benchmarks, pathlib.Path(directory), args.big_source_functions)
+        for name, path in programs.items():
+            result = measure(path, args.engine, args.warmup, args.repeat, pathlib.Path(directory))
+            results["benchmarks"][name] = result
+            phases = " ".join(
+                f"{name}={phase['wall_time']:.3f}s" for name, phase in result["phases"].items() if name != "counts"
+            )
+            print(
+                f"{name:<20} median {result['wall']['median']:.3f}s, min {result['wall']['min']:.3f}s, "
+                f"peak {result['peak_rss_kb'] / 1024:.1f} MB, {phases}"
+            )
+
+    if args.output is not None:
+        with open(args.output, mode="w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline, mode="r") as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"Regressions above {args.threshold:.0%}: {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import argparse
+import pathlib
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / "app"))
+
+import lox
+
+
+SNIPPET = """\
+// Binary trees, with a few strings and comments mixed in.
+class Tree {
+  init(item, depth) {
+    this.item = item;
+    this.depth = depth;
+    if (depth > 0) {
+      var item2 = item + item;
+      this.left = Tree(item2 - 1, depth - 1);
+      this.right = Tree(item2, depth - 1);
+    } else {
+      this.left = nil;
+      this.right = nil;
+    }
+  }
+
+  check() {
+    if (this.left == nil) return this.item;
+    return this.item + this.left.check() - this.right.check();
+  }
+}
+
+fun fib(n) { if (n < 2) return n; return fib(n - 1) + fib(n - 2); }
+var total = 0;
+for (var i = 0; i <= 1000; i = i + 1) { total = total + i * 3.25 / 2; }
+print "total: " + "done" ;
+print !(total != 12.5) and true or false;
+"""
+
+
+def generate_source(size: int) -> str:
+    return SNIPPET * max(1, size // len(SNIPPET))
+
+
+def measure(source: str, fast: bool, repeat: int) -> tuple[float, int]:
+    best = float("inf")
+    count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tokens = lox.TokenBuffer(source)
+        lox.Scanner(source, fast=fast).scan_into(tokens)
+        count = len(tokens)
+        best = min(best, time.perf_counter() - start)
+    return best, count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=float, default=4.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    source = generate_source(int(args.size_mb * 1024 * 1024))
+    megabytes = len(source.encode()) / (1024 * 1024)
+    for name, fast in (("fast", True), ("slow", False)):
+        seconds, count = measure(source, fast, args.repeat)
+        print(f"{name}: {megabytes:.2f} MB, {count} tokens, {seconds:.3f}s, {megabytes / seconds:.2f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import argparse
+import pathlib
+import sys
+import tracemalloc
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / "app"))
+
+import lox
+from scanner_throughput import generate_source
+
+
+def measure(source: str, compact: bool) -> tuple[int, int]:
+    tracemalloc.start()
+    if compact:
+        tokens = lox.TokenBuffer(source)
+        lox.Scanner(source).scan_into(tokens)
+    else:
+        tokens = lox.Scanner(source).scan_tokens()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, len(tokens)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=float, default=1.0)
+    args = parser.parse_args()
+
+    source = generate_source(int(args.size_mb * 1024 * 1024))
+    print(f"source: {len(source.encode()) / (1024 * 1024):.2f} MB")
+    for name, compact in (("list[Token]", False), ("TokenBuffer", True)):
+        size, count = measure(source, compact)
+        print(f"{name}: {count} tokens, {size / (1024 * 1024):.2f} MB, {size / count:.1f} bytes/token")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import contextlib
+import dataclasses
+import io
+import pathlib
+import sys
+import unittest
+from typing import Any
+from unittest import mock
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "app"))
+
+import main as lox_main
+import lox
+
+
+UNLOWERED = {"optimize": lox.Optimizer}
+
+PROGRAMS = {
+    "counter": """
+        for (var i = 0; i < 3; i = i + 1) print i;
+        for (var i = 10; i >= 0; i = i - 4) print i;
+        for (var i = 0; i != 2; i = i + 0.5) print i;
+    """,
+    "shadowed_in_body": """
+        for (var i = 0; i < 3; i = i + 1) { var i = "shadow"; print i; }
+    """,
+    "shadowing_outer": """
+        var i = 100;
+        for (var i = 0; i < 2; i = i + 1) print i;
+        print i;
+        { var i = 7; for (var i = 0; i < 2; i = i + 1) print i; print i; }
+    """,
+    "nested_same_name": """
+        for (var i = 0; i < 2; i = i + 1) for (var i = 5; i < 7; i = i + 1) print i;
+    """,
+    "compare_type_error": """
+        for (var i = "a"; i <
+          3; i = i + 1) {}
+    """,
+    "increment_type_error": """
+        for (var i = 0; i < 3; i = i
+          + 1) { print i; i = "x"; }
+    """,
+    "decrement_type_error": """
+        fun f() {
+          for (var i = 3; i > 0; i = i
+            - 1) { i = nil; }
+        }
+        f();
+    """,
+    "closures": """
+        var fs = [];
+        for (var i = 0; i < 3; i = i + 1) { fun f() { return i; } fs.append(f); }
+        print fs[0]();
+        print fs[2]();
+        for (var i = 0; i < 10; i = i + 1) { fun skip() { i = i + 3; } skip(); print i; }
+    """,
+    "early_return": """
+        fun find(n) { for (var i = 0; i < 10; i = i + 1) { if (i == n) return i; } return nil; }
+        print find(4);
+        print find(40);
+    """,
+}
+
+
+def run(source: str, engine: str, passes: dict[str, type[lox.Optimizer]]) -> tuple[str, str, int]:
+    stream, errors = io.StringIO(), io.StringIO()
+    code = 0
+    with mock.patch.dict(lox_main.PASSES, passes, clear=True), contextlib.redirect_stderr(errors):
+        try:
+            lox_main.run(source, engine, output=lox.Output(stream))
+        except SystemExit as ex:
+            code = ex.code
+    return stream.getvalue(), errors.getvalue(), code
+
+
+def node_types(source: str) -> set[str]:
+    interpreter = lox.Interpreter(lox.Output(io.StringIO()))
+    program = lox_main.load_program(source, interpreter)
+    types = set()
+
+    def walk(node: Any) -> None:
+        if isinstance(node, list):
+            for item in node:
+                walk(item)
+        elif dataclasses.is_dataclass(node) and isinstance(node, (lox.Expr, lox.Stmt)):
+            types.add(type(node).__name__)
+            for field in dataclasses.fields(node):
+                walk(getattr(node, field.name))
+
+    walk(list(program.stmts))
+    return types
+
+
+class LoweringTest(unittest.TestCase):
+    def test_matches_unlowered_tree(self) -> None:
+        for name, source in PROGRAMS.items():
+            expected = run(source, "tree", UNLOWERED)
+            for engine in sorted(lox_main.ENGINES):
+                with self.subTest(program=name, engine=engine):
+                    self.assertEqual(run(source, engine, lox_main.PASSES), expected)
+
+    def test_errors_keep_operator_line(self) -> None:
+        self.assertEqual(
+            run(PROGRAMS["compare_type_error"], "tree", lox_main.PASSES),
+            ("", "Operands must be numbers.\n[line 2]\n", 70),
+        )
+        self.assertEqual(
+            run(PROGRAMS["increment_type_error"], "tree", lox_main.PASSES),
+            ("0\n", "Operands must be two numbers or two strings.\n[line 3]\n", 70),
+        )
+
+    def test_for_loops_are_lowered(self) -> None:
+        self.assertTrue({"ForStmt", "CompareConstantExpr", "IncrementExpr"} <= node_types(PROGRAMS["counter"]))
+
+    def test_other_loops_and_assignments_are_kept(self) -> None:
+        types = node_types("var i = 0; while (i < 3) { print i; i = i + 1; } var n = 0; n = n + 1; print n < 2;")
+        self.assertTrue(types.isdisjoint({"ForStmt", "CompareConstantExpr", "IncrementExpr"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
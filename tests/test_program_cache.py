@@ -0,0 +1,69 @@
+import contextlib
+import gc
+import io
+import os
+import pathlib
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "app"))
+
+import main as lox_main
+import lox
+
+
+def run_cached(source: str, natives: lox.Natives | None = None) -> str:
+    stream = io.StringIO()
+    interpreter = lox.Interpreter(lox.Output(stream), natives=natives)
+    program = lox_main.load_program(source, interpreter, use_cache=True)
+    interpreter.interpret_stmts(program.stmts)
+    return stream.getvalue()
+
+
+class ProgramCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        environment = mock.patch.dict(os.environ, {"LOX_CACHE_DIR": directory.name})
+        environment.start()
+        self.addCleanup(environment.stop)
+
+    def test_hit_reuses_program(self) -> None:
+        source = "var a = 1; print a + 1;"
+        self.assertEqual(run_cached(source), "2\n")
+        self.assertEqual(run_cached(source), "2\n")
+
+    def test_different_natives_miss(self) -> None:
+        source = "print zzz;"
+        errors = io.StringIO()
+        with contextlib.redirect_stderr(errors), self.assertRaises(RuntimeError):
+            run_cached(source)
+        self.assertEqual(errors.getvalue(), "Undefined variable 'zzz'.\n[line 1]\n")
+
+        natives = lox.Natives()
+        natives.register("zzz", 0, lambda interpreter: None)
+        self.assertEqual(run_cached(source, natives), "<native fn>\n")
+
+    def test_foreign_file_is_not_unpickled(self) -> None:
+        source = "print 1;"
+        run_cached(source)
+        (path,) = pathlib.Path(os.environ["LOX_CACHE_DIR"]).glob("*.loxc")
+        path.write_bytes(b"not a cache file")
+        self.assertEqual(run_cached(source), "1\n")
+
+    def test_load_keeps_gc_disabled(self) -> None:
+        source = "print 1;"
+        run_cached(source)
+        gc.disable()
+        try:
+            self.assertEqual(run_cached(source), "1\n")
+            self.assertFalse(gc.isenabled())
+        finally:
+            gc.enable()
+
+
+if __name__ == "__main__":
+    unittest.main()